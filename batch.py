@@ -0,0 +1,292 @@
+# batch.py - Vectorized simulation of many games in lockstep
+import argparse
+import time
+import numpy as np
+from game import Game, ACTIONS
+from entities import PelletGrid
+from ghosts import CHASE, RANDOM, PATROL, DIRECTIONS, FreeMask, cardinal
+
+class BatchGame:
+    def __init__(self, level_num, num_games, seed=None):
+        self.level_num = level_num
+        self.num_games = num_games
+        self.rng = np.random.default_rng(seed)
+
+        # Use a headless Game as the template so the geometry and the
+        # rules' constants match the single-game engine exactly
+        template = Game(None, level_num)
+        self.tile_size = template.tile_size
+        self.offset_x = template.map_offset_x
+        self.offset_y = template.map_offset_y
+        self.entity_size = template.tile_size
+        self.free_mask = FreeMask(template.wall_rects, self.entity_size)
+
+        # Pac-Man and ghost properties
+        pacman = template.pacman
+        self.pacman_start = np.array([pacman.start_x, pacman.start_y], dtype=np.float64)
+        self.pacman_speed = pacman.speed
+        self.ghost_start = np.array([[ghost.start_x, ghost.start_y] for ghost in template.ghosts], dtype=np.int64).reshape(-1, 2)
+        self.ghost_speed = template.ghosts[0].speed if template.ghosts else 0.0
+        self.num_ghosts = len(self.ghost_start)
+
+        # Pellet layout shared by every game
+        grid = template.pellet_grid
+        self.pellet_rows = grid.rows
+        self.pellet_cols = grid.cols
+        self.initial_pellets = np.frombuffer(bytes(grid.cells), dtype=np.uint8).reshape(grid.rows, grid.cols)
+        self.initial_remaining = grid.remaining
+        self.unreachable_pellets = template.level.unreachable_pellets
+
+        # Pellet rect placement inside a tile for each kind
+        pellet_sizes = np.zeros(3, dtype=np.int64)
+        pellet_sizes[PelletGrid.PELLET] = self.tile_size // 5
+        pellet_sizes[PelletGrid.POWER] = self.tile_size // 2
+        self.pellet_sizes = pellet_sizes
+        self.pellet_insets = self.tile_size // 2 - pellet_sizes // 2
+        self.pellet_scores = np.array([0, 10, 50], dtype=np.int64)
+
+        self.actions = np.array([(0, 0) if action is None else action for action in ACTIONS], dtype=np.int64)
+
+        # Allocate the per-game state and start every game
+        n, g = num_games, self.num_ghosts
+        self.pacman_pos = np.zeros((n, 2), dtype=np.float64)
+        self.pacman_last_pos = np.zeros((n, 2), dtype=np.float64)
+        self.pacman_dir = np.zeros((n, 2), dtype=np.int64)
+        self.pacman_next_dir = np.zeros((n, 2), dtype=np.int64)
+        self.pacman_moving = np.zeros(n, dtype=bool)
+        self.ghost_pos = np.zeros((n, g, 2), dtype=np.int64)
+        self.ghost_dir = np.zeros((n, g, 2), dtype=np.int64)
+        self.ghost_behavior = np.zeros((n, g), dtype=np.int64)
+        self.patrol_points = np.zeros((n, g, 4, 2), dtype=np.int64)
+        self.patrol_index = np.zeros((n, g), dtype=np.int64)
+        self.pellets = np.zeros((n, self.pellet_rows, self.pellet_cols), dtype=np.uint8)
+        self.remaining = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lives = np.zeros(n, dtype=np.int64)
+        self.power_active = np.zeros(n, dtype=bool)
+        self.power_timer = np.zeros(n, dtype=np.int64)
+        self.frames = np.zeros(n, dtype=np.int64)
+
+        # Finished games, kept for reporting
+        self.finished_scores = []
+        self.finished_frames = []
+        self.levels_completed = 0
+        self.total_steps = 0
+
+        self.reset(np.ones(n, dtype=bool))
+
+    def reset(self, mask):
+        # Start fresh games wherever mask is True
+        count = int(mask.sum())
+        if not count:
+            return
+        self.reset_positions(mask)
+        self.ghost_behavior[mask] = self.rng.integers(0, 3, size=(count, self.num_ghosts))
+        self.patrol_points[mask, :, :, 0] = self.rng.integers(100, 701, size=(count, self.num_ghosts, 4))
+        self.patrol_points[mask, :, :, 1] = self.rng.integers(100, 501, size=(count, self.num_ghosts, 4))
+        self.patrol_index[mask] = 0
+        self.pellets[mask] = self.initial_pellets
+        self.remaining[mask] = self.initial_remaining
+        self.score[mask] = 0
+        self.lives[mask] = 3
+        self.power_active[mask] = False
+        self.power_timer[mask] = 0
+        self.frames[mask] = 0
+
+    def reset_positions(self, mask):
+        # Send Pac-Man and the ghosts back to their starting positions
+        self.pacman_pos[mask] = self.pacman_start
+        self.pacman_last_pos[mask] = self.pacman_start
+        self.pacman_dir[mask] = 0
+        self.pacman_next_dir[mask] = 0
+        self.pacman_moving[mask] = False
+        self.ghost_pos[mask] = self.ghost_start
+        self.ghost_dir[mask] = 0
+
+    def step(self, actions=None):
+        # Advance every game by one tick; actions are indexes into ACTIONS.
+        # Returns the score gained and which games ended this tick; ended
+        # games are restarted before returning
+        n = self.num_games
+        if actions is None:
+            actions = np.zeros(n, dtype=np.int64)
+        actions = np.asarray(actions)
+        score_before = self.score.copy()
+
+        # Apply input the way PacMan.set_direction does
+        pressed = actions != 0
+        self.pacman_next_dir[pressed] = self.actions[actions[pressed]]
+        self.pacman_moving |= pressed
+
+        self.update_pacman()
+        self.eat_pellets()
+        self.check_ghost_collisions()
+        self.update_ghosts()
+
+        # Update power pellet timers
+        self.power_timer[self.power_active] -= 1
+        self.power_active &= self.power_timer > 0
+
+        self.frames += 1
+        self.total_steps += n
+
+        rewards = self.score - score_before
+        game_over = self.lives <= 0
+        level_complete = self.remaining <= self.unreachable_pellets
+        done = game_over | level_complete
+
+        if done.any():
+            self.finished_scores.extend(self.score[done].tolist())
+            self.finished_frames.extend(self.frames[done].tolist())
+            self.levels_completed += int((level_complete & ~game_over).sum())
+            self.reset(done)
+
+        return rewards, done
+
+    def update_pacman(self):
+        speed = self.pacman_speed
+
+        # Try to turn into the requested direction
+        turning = self.pacman_moving & (self.pacman_next_dir != self.pacman_dir).any(1)
+        candidate = self.pacman_pos + self.pacman_next_dir * speed
+        turning &= self.free_mask.is_free(np.trunc(candidate).astype(np.int64))
+        self.pacman_dir[turning] = self.pacman_next_dir[turning]
+
+        # Move in the current direction, or snap back on a wall
+        moving = self.pacman_moving & (self.pacman_dir != 0).any(1)
+        candidate = self.pacman_pos + self.pacman_dir * speed
+        clear = self.free_mask.is_free(np.trunc(candidate).astype(np.int64))
+
+        advance = moving & clear
+        self.pacman_last_pos[advance] = self.pacman_pos[advance]
+        self.pacman_pos[advance] = candidate[advance]
+
+        blocked = moving & ~clear
+        self.pacman_pos[blocked] = self.pacman_last_pos[blocked]
+        self.pacman_moving[blocked] = False
+        self.pacman_dir[blocked] = 0
+        self.pacman_next_dir[blocked] = 0
+
+    def eat_pellets(self):
+        size = self.entity_size
+        rect = np.trunc(self.pacman_pos).astype(np.int64)
+        games = np.arange(self.num_games)
+
+        # Tiles under Pac-Man's box, clamped to the grid as PelletGrid.eat does
+        first_col = np.maximum(0, (rect[:, 0] - self.offset_x) // self.tile_size)
+        first_row = np.maximum(0, (rect[:, 1] - self.offset_y) // self.tile_size)
+        last_col = np.minimum(self.pellet_cols - 1, (rect[:, 0] + size - 1 - self.offset_x) // self.tile_size)
+        last_row = np.minimum(self.pellet_rows - 1, (rect[:, 1] + size - 1 - self.offset_y) // self.tile_size)
+        inside = (first_col <= last_col) & (first_row <= last_row)
+
+        for col, row in ((first_col, first_row), (last_col, first_row), (first_col, last_row), (last_col, last_row)):
+            col = np.clip(col, 0, self.pellet_cols - 1)
+            row = np.clip(row, 0, self.pellet_rows - 1)
+            kind = self.pellets[games, row, col].astype(np.int64)
+
+            # Same overlap test as Rect.colliderect against the pellet rect
+            pellet_x = self.offset_x + col * self.tile_size + self.pellet_insets[kind]
+            pellet_y = self.offset_y + row * self.tile_size + self.pellet_insets[kind]
+            pellet_size = self.pellet_sizes[kind]
+            eaten = inside & (kind != 0) & \
+                (rect[:, 0] < pellet_x + pellet_size) & (pellet_x < rect[:, 0] + size) & \
+                (rect[:, 1] < pellet_y + pellet_size) & (pellet_y < rect[:, 1] + size)
+
+            self.pellets[games[eaten], row[eaten], col[eaten]] = PelletGrid.EMPTY
+            self.remaining -= eaten
+            self.score += np.where(eaten, self.pellet_scores[kind], 0)
+
+            power = eaten & (kind == PelletGrid.POWER)
+            self.power_active |= power
+            self.power_timer[power] = 300  # 5 seconds at 60 ticks per second
+
+    def check_ghost_collisions(self):
+        if not self.num_ghosts:
+            return
+        size = self.entity_size
+        rect = np.trunc(self.pacman_pos).astype(np.int64)[:, None, :]
+        touching = (np.abs(self.ghost_pos - rect) < size).all(2)
+
+        # With a power pellet active the touched ghosts are eaten
+        eaten = touching & self.power_active[:, None]
+        self.ghost_pos[eaten] = np.broadcast_to(self.ghost_start, self.ghost_pos.shape)[eaten]
+        self.ghost_dir[eaten] = 0
+        self.score += 200 * eaten.sum(1)
+
+        # Otherwise Pac-Man loses a life and everyone goes back to the start
+        caught = touching.any(1) & ~self.power_active
+        self.lives -= caught
+        self.reset_positions(caught & (self.lives > 0))
+
+    def update_ghosts(self):
+        if not self.num_ghosts:
+            return
+        n, g = self.num_games, self.num_ghosts
+
+        # Ghosts flash back to normal during the last second of power
+        scared = self.power_active & ((self.power_timer >= 60) | (self.power_timer % 10 < 5))
+        scared = np.broadcast_to(scared[:, None], (n, g))
+
+        half = self.entity_size // 2
+        pacman_center = np.trunc(self.pacman_pos).astype(np.int64)[:, None, :] + half
+        ghost_center = self.ghost_pos + half
+
+        # Patrolling ghosts move on once they reach their point
+        target = np.take_along_axis(self.patrol_points, self.patrol_index[:, :, None, None], axis=2)[:, :, 0]
+        to_target = target - ghost_center
+        arrived = (self.ghost_behavior == PATROL) & ~scared & (np.abs(to_target) < 10).all(2)
+        self.patrol_index = np.where(arrived, (self.patrol_index + 1) % 4, self.patrol_index)
+
+        # Pick each ghost's heading from its behavior
+        offset = np.where((self.ghost_behavior == PATROL)[:, :, None], to_target, pacman_center - ghost_center)
+        offset = np.where(scared[:, :, None], -(pacman_center - ghost_center), offset)
+        steer = scared | (self.ghost_behavior == CHASE) | ((self.ghost_behavior == PATROL) & ~arrived)
+        self.ghost_dir = np.where(steer[:, :, None], cardinal(offset), self.ghost_dir)
+
+        wander = (self.ghost_behavior == RANDOM) & ~scared & (self.rng.random((n, g)) < 0.02)
+        if wander.any():
+            self.ghost_dir[wander] = DIRECTIONS[self.rng.integers(0, 4, size=int(wander.sum()))]
+
+        # Move, rounding like pygame does when adding floats to a Rect
+        speed = np.where(scared, self.ghost_speed * 0.3, self.ghost_speed)[:, :, None]
+        candidate = np.floor(self.ghost_pos + self.ghost_dir * speed + 0.5).astype(np.int64)
+        clear = self.free_mask.is_free(candidate)
+        self.ghost_pos = np.where(clear[:, :, None], candidate, self.ghost_pos)
+
+        # Blocked ghosts take the first open direction in a random order
+        blocked = ~clear
+        if blocked.any():
+            position = self.ghost_pos[blocked]
+            order = np.argsort(self.rng.random((len(position), 4)), axis=1)
+            tries = DIRECTIONS[order]
+            steps = np.floor(position[:, None, :] + tries * self.ghost_speed + 0.5).astype(np.int64)
+            open_ = self.free_mask.is_free(steps)
+            found = open_.any(1)
+            first = open_.argmax(1)
+            chosen = np.where(found[:, None], tries[np.arange(len(position)), first], self.ghost_dir[blocked])
+            self.ghost_dir[blocked] = chosen
+
+def benchmark(level_num=1, num_games=256, steps=1000, seed=0):
+    # Random-input rollout; returns environment steps per second
+    batch = BatchGame(level_num, num_games, seed)
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(0, len(ACTIONS), size=(steps, num_games))
+
+    start = time.perf_counter()
+    for tick in range(steps):
+        batch.step(actions[tick])
+    elapsed = time.perf_counter() - start
+    return batch.total_steps / elapsed, batch
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run many Pac-Man games in lockstep")
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--games", type=int, default=256)
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    steps_per_second, batch = benchmark(args.level, args.games, args.steps, args.seed)
+    print(f"Level {args.level}: {args.games} games x {args.steps} steps")
+    print(f"{steps_per_second:,.0f} environment steps per second")
+    print(f"{len(batch.finished_scores)} games finished, {batch.levels_completed} levels completed")
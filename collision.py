@@ -0,0 +1,109 @@
+# collision.py - Grid-indexed collision layer for static walls
+import pygame
+
+class CollisionGrid:
+    def __init__(self, rects, cell_size):
+        self.cell_size = cell_size
+        self.rects = [pygame.Rect(rect) for rect in rects]
+
+        # Cover the bounding box of every wall; anything outside it is open space
+        if self.rects:
+            bounds = self.rects[0].unionall(self.rects[1:])
+        else:
+            bounds = pygame.Rect(0, 0, 0, 0)
+        self.origin_x = bounds.x
+        self.origin_y = bounds.y
+        self.cols = max(1, -(-bounds.width // cell_size))
+        self.rows = max(1, -(-bounds.height // cell_size))
+
+        # Each cell holds the walls that overlap it
+        self.cells = [() for _ in range(self.cols * self.rows)]
+        for rect in self.rects:
+            first_col, first_row, last_col, last_row = self.cell_span(rect.x, rect.y, rect.width, rect.height)
+            for row in range(first_row, last_row + 1):
+                for col in range(first_col, last_col + 1):
+                    index = row * self.cols + col
+                    self.cells[index] = self.cells[index] + (rect,)
+
+    def cell_span(self, x, y, width, height):
+        # Range of cells (inclusive) overlapped by a box, clamped to the grid
+        first_col = max(0, (x - self.origin_x) // self.cell_size)
+        first_row = max(0, (y - self.origin_y) // self.cell_size)
+        last_col = min(self.cols - 1, (x + width - 1 - self.origin_x) // self.cell_size)
+        last_row = min(self.rows - 1, (y + height - 1 - self.origin_y) // self.cell_size)
+        return first_col, first_row, last_col, last_row
+
+    def collides(self, rect):
+        # Only the handful of cells under the box are tested, whatever the maze size
+        first_col, first_row, last_col, last_row = self.cell_span(rect.x, rect.y, rect.width, rect.height)
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                for wall in self.cells[row * self.cols + col]:
+                    if rect.colliderect(wall):
+                        return True
+        return False
+
+    def __iter__(self):
+        return iter(self.rects)
+
+    def __len__(self):
+        return len(self.rects)
+
+class SpatialHash:
+    def __init__(self, cell_size):
+        # Buckets for moving entities, rebuilt every tick; only entities
+        # sharing a bucket are ever tested against each other
+        self.cell_size = cell_size
+        self.cells = {}
+        self.tests = 0  # Rect-vs-rect tests run since the last reset_tests()
+
+    def clear(self):
+        self.cells.clear()
+
+    def reset_tests(self):
+        tests = self.tests
+        self.tests = 0
+        return tests
+
+    def cell_keys(self, rect):
+        size = self.cell_size
+        for row in range(rect.y // size, (rect.bottom - 1) // size + 1):
+            for col in range(rect.x // size, (rect.right - 1) // size + 1):
+                yield col, row
+
+    def insert(self, key, rect):
+        for cell in self.cell_keys(rect):
+            bucket = self.cells.get(cell)
+            if bucket is None:
+                self.cells[cell] = [(key, rect)]
+            else:
+                bucket.append((key, rect))
+
+    def query(self, rect):
+        # Keys of the entities overlapping rect, in key order
+        seen = set()
+        hits = []
+        for cell in self.cell_keys(rect):
+            for key, other in self.cells.get(cell, ()):
+                if key not in seen:
+                    seen.add(key)
+                    self.tests += 1
+                    if rect.colliderect(other):
+                        hits.append(key)
+        return sorted(hits)
+
+    def pairs(self):
+        # Overlapping (a, b) key pairs with a < b, in order; a pair sharing
+        # several buckets is only tested once
+        seen = set()
+        hits = []
+        for bucket in self.cells.values():
+            for i, (a, rect_a) in enumerate(bucket):
+                for b, rect_b in bucket[i + 1:]:
+                    pair = (a, b) if a < b else (b, a)
+                    if pair not in seen:
+                        seen.add(pair)
+                        self.tests += 1
+                        if rect_a.colliderect(rect_b):
+                            hits.append(pair)
+        return sorted(hits)
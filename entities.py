@@ -2,8 +2,36 @@
 import pygame
 import random
 import math
+from render import get_pacman_frame, get_ghost_sprite
+
+def interpolate(previous, current, alpha):
+    # Position between the last two simulation ticks, alpha in [0, 1]
+    return (
+        round(previous[0] + (current[0] - previous[0]) * alpha),
+        round(previous[1] + (current[1] - previous[1]) * alpha)
+    )
+
+def align_to_tile(rect, step, offset_x, offset_y, tile_size):
+    # Boxes are a tile wide, so a box can only turn once it is lined up
+    # with the tile its center is in; until then it slides toward that line
+    if step[0]:
+        line = offset_y + (rect.centery - offset_y) // tile_size * tile_size
+        if rect.y != line:
+            return (0, 1 if line > rect.y else -1)
+    else:
+        line = offset_x + (rect.centerx - offset_x) // tile_size * tile_size
+        if rect.x != line:
+            return (1 if line > rect.x else -1, 0)
+    return step
 
 class PacMan:
+    # Fixed attribute layout, no per-instance __dict__
+    __slots__ = (
+        'start_x', 'start_y', 'size', 'rect', 'mouth_angle', 'mouth_opening', 'animation_speed',
+        'speed', 'grid_size', 'moving', 'direction', 'next_direction', 'last_direction',
+        'position', 'last_position', 'grid_x', 'grid_y', 'previous_pos'
+    )
+    
     def __init__(self, x, y, size):
         self.start_x = x
         self.start_y = y
@@ -37,26 +65,42 @@ class PacMan:
         self.last_position = [float(self.start_x), float(self.start_y)]
         self.grid_x = int(self.start_x / self.size)
         self.grid_y = int(self.start_y / self.size)
+        self.previous_pos = self.rect.topleft  # Where the last tick started, for interpolation
     
     def set_direction(self, dx, dy):
         # Store the new direction
         self.next_direction = (dx, dy)
         self.moving = True
     
+    def get_state(self):
+        # Everything update() reads or writes, as an immutable tuple
+        return (
+            self.position[0], self.position[1],
+            self.last_position[0], self.last_position[1],
+            self.rect.x, self.rect.y,
+            self.direction, self.next_direction, self.last_direction, self.moving,
+            self.mouth_angle, self.mouth_opening, self.previous_pos
+        )
+    
+    def set_state(self, state):
+        (x, y, last_x, last_y, self.rect.x, self.rect.y,
+         self.direction, self.next_direction, self.last_direction, self.moving,
+         self.mouth_angle, self.mouth_opening, self.previous_pos) = state
+        self.position = [x, y]
+        self.last_position = [last_x, last_y]
+        self.grid_x = int(x / self.grid_size)
+        self.grid_y = int(y / self.grid_size)
+    
     def update(self, walls):
+        self.previous_pos = self.rect.topleft
+        
         # Try to move in the next direction if it's different from current
         if self.next_direction != self.direction and self.moving:
             next_x = self.position[0] + self.next_direction[0] * self.speed
             next_y = self.position[1] + self.next_direction[1] * self.speed
             next_rect = pygame.Rect(next_x, next_y, self.size, self.size)
             
-            can_move = True
-            for wall in walls:
-                if next_rect.colliderect(wall):
-                    can_move = False
-                    break
-            
-            if can_move:
+            if not walls.collides(next_rect):
                 self.direction = self.next_direction
                 self.last_direction = self.direction
         
@@ -66,13 +110,7 @@ class PacMan:
             next_y = self.position[1] + self.direction[1] * self.speed
             next_rect = pygame.Rect(next_x, next_y, self.size, self.size)
             
-            can_move = True
-            for wall in walls:
-                if next_rect.colliderect(wall):
-                    can_move = False
-                    break
-            
-            if can_move:
+            if not walls.collides(next_rect):
                 self.last_position = self.position.copy()  # Store last valid position
                 self.position[0] = next_x
                 self.position[1] = next_y
@@ -101,64 +139,71 @@ class PacMan:
             if self.mouth_angle <= 0:
                 self.mouth_opening = True
     
-    def draw(self, screen):
-        # Calculate the center of the character
-        center = (self.rect.x + self.rect.width//2, self.rect.y + self.rect.height//2)
-        
-        # Draw Pac-Man as a yellow circle with a mouth
-        pygame.draw.circle(screen, (255, 255, 0), center, self.rect.width//2)
-        
-        # Calculate mouth angle based on direction
-        angle = 0
-        if self.direction == (1, 0):  # Right
-            angle = 0
-        elif self.direction == (0, 1):  # Down
-            angle = 90
-        elif self.direction == (-1, 0):  # Left
-            angle = 180
-        elif self.direction == (0, -1):  # Up
-            angle = 270
-        
-        # Draw the mouth as a pie slice
-        if self.direction != (0, 0):  # Only draw mouth if moving
-            pygame.draw.polygon(screen, (0, 0, 0), [
-                center,
-                (center[0] + math.cos(math.radians(angle - self.mouth_angle)) * self.rect.width//2,
-                 center[1] + math.sin(math.radians(angle - self.mouth_angle)) * self.rect.width//2),
-                (center[0] + math.cos(math.radians(angle + self.mouth_angle)) * self.rect.width//2,
-                 center[1] + math.sin(math.radians(angle + self.mouth_angle)) * self.rect.width//2)
-            ])
+    def draw(self, screen, alpha=1.0):
+        # Blit the pre-rendered frame for this size, direction and mouth angle;
+        # the blit area is what dirty-rect rendering needs to update
+        frame = get_pacman_frame(self.rect.width, self.direction, self.mouth_angle)
+        return screen.blit(frame, interpolate(self.previous_pos, self.rect.topleft, alpha))
 
 class Ghost:
-    def __init__(self, x, y, size, color):
+    __slots__ = (
+        'start_x', 'start_y', 'size', 'color', 'rng', 'rect', 'direction', 'speed', 'previous_pos',
+        'behavior_type', 'patrol_points', 'current_patrol_point', 'navigator', 'junctions', 'route'
+    )
+    
+    scared_color = (0, 0, 255)  # Blue when scared
+    
+    def __init__(self, x, y, size, color, rng=None):
         self.start_x = x
         self.start_y = y
         self.size = size
         self.color = color
-        self.scared_color = (0, 0, 255)  # Blue when scared
+        self.rng = rng or random.Random()  # Shared with the other ghosts of a game
+        self.navigator = None  # Optional maze-aware steering, see pathfinding.py
+        self.junctions = None  # Optional corridor following, see junctions.py
         self.reset()
         
         # Ghost behavior type
-        self.behavior_type = random.choice(["chase", "random", "patrol"])
+        self.behavior_type = self.rng.choice(["chase", "random", "patrol"])
         self.patrol_points = []
         self.current_patrol_point = 0
         
         # Create patrol points
         for _ in range(4):
             self.patrol_points.append((
-                random.randint(100, 700),
-                random.randint(100, 500)
+                self.rng.randint(100, 700),
+                self.rng.randint(100, 500)
             ))
     
     def reset(self):
         self.rect = pygame.Rect(self.start_x, self.start_y, self.size, self.size)
         self.direction = (0, 0)
         self.speed = 0.8  # Reduced from 1.5 to 0.8 for slower movement
+        self.previous_pos = self.rect.topleft  # Where the last tick started, for interpolation
+        self.route = []  # Steps left to the next junction, last first
+    
+    def get_state(self):
+        # Patrol points are fixed for the ghost's lifetime, so they are left out
+        return (
+            self.rect.x, self.rect.y, self.direction, self.speed,
+            self.behavior_type, self.current_patrol_point, self.previous_pos, tuple(self.route)
+        )
+    
+    def set_state(self, state):
+        (self.rect.x, self.rect.y, self.direction, self.speed,
+         self.behavior_type, self.current_patrol_point, self.previous_pos, route) = state
+        self.route = list(route)
     
     def update(self, walls, pacman, scared=False):
+        self.previous_pos = self.rect.topleft
+        
         # Adjust speed based on scared state
         actual_speed = self.speed * 0.3 if scared else self.speed  # Reduced scared speed from 0.5 to 0.3
         
+        if self.junctions:
+            self.follow_corridor(pacman, scared, actual_speed)
+            return
+        
         # Determine direction based on behavior type
         if scared:
             # Run away from Pac-Man when scared
@@ -177,19 +222,20 @@ class Ghost:
         next_rect.y += self.direction[1] * actual_speed
         
         # Check for wall collisions
-        collision = False
-        for wall in walls:
-            if next_rect.colliderect(wall):
-                collision = True
-                break
-        
-        if not collision:
+        if not walls.collides(next_rect):
             self.rect = next_rect
         else:
             # If we hit a wall, choose a new direction
             self.choose_new_direction(walls)
     
     def chase_pacman(self, pacman):
+        # Follow the maze when a navigator knows the way
+        if self.navigator:
+            direction = self.navigator.toward(self.rect, pacman.rect.center)
+            if direction:
+                self.direction = direction
+                return
+        
         # Find direction to Pac-Man
         dx = pacman.rect.centerx - self.rect.centerx
         dy = pacman.rect.centery - self.rect.centery
@@ -206,6 +252,12 @@ class Ghost:
             self.direction = (0, 1 if dy > 0 else -1)
     
     def flee_from_pacman(self, pacman):
+        if self.navigator:
+            direction = self.navigator.away(self.rect, pacman.rect.center, self.direction)
+            if direction:
+                self.direction = direction
+                return
+        
         # Find direction away from Pac-Man
         dx = self.rect.centerx - pacman.rect.centerx
         dy = self.rect.centery - pacman.rect.centery
@@ -222,9 +274,9 @@ class Ghost:
             self.direction = (0, 1 if dy > 0 else -1)
     
     def move_randomly(self):
-        if random.random() < 0.02:  # 2% chance to change direction each frame
+        if self.rng.random() < 0.02:  # 2% chance to change direction each frame
             directions = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-            self.direction = random.choice(directions)
+            self.direction = self.rng.choice(directions)
     
     def patrol(self):
         if not self.patrol_points:
@@ -242,6 +294,12 @@ class Ghost:
             self.current_patrol_point = (self.current_patrol_point + 1) % len(self.patrol_points)
             return
         
+        if self.navigator:
+            direction = self.navigator.toward(self.rect, target)
+            if direction:
+                self.direction = direction
+                return
+        
         # Normalize to get unit direction
         length = max(0.1, math.sqrt(dx*dx + dy*dy))
         dx /= length
@@ -253,125 +311,196 @@ class Ghost:
         else:
             self.direction = (0, 1 if dy > 0 else -1)
     
+    def follow_corridor(self, pacman, scared, actual_speed):
+        # Decide only on reaching a junction, then run the corridor's tiles
+        # to the next one; corridors are open by construction, so there is
+        # nothing to test against the walls
+        if not self.route:
+            if scared:
+                self.route = self.junctions.route(self.rect, self.direction, pacman.rect.center, flee=True)
+            elif self.behavior_type == "chase":
+                self.route = self.junctions.route(self.rect, self.direction, pacman.rect.center)
+            elif self.behavior_type == "patrol" and self.patrol_points:
+                target = self.patrol_points[self.current_patrol_point]
+                if abs(target[0] - self.rect.centerx) < 10 and abs(target[1] - self.rect.centery) < 10:
+                    self.current_patrol_point = (self.current_patrol_point + 1) % len(self.patrol_points)
+                    target = self.patrol_points[self.current_patrol_point]
+                self.route = self.junctions.route(self.rect, self.direction, target)
+            else:
+                self.route = self.junctions.route(self.rect, self.direction, rng=self.rng)
+        
+        # Whole pixels per tick, the same as a Rect moved by actual_speed
+        step = round(actual_speed)
+        if not self.route or not step:
+            return
+        
+        x, y, self.direction = self.route[-1]
+        rx, ry = self.rect.topleft
+        if rx != x:
+            rx = min(rx + step, x) if x > rx else max(rx - step, x)
+        else:
+            ry = min(ry + step, y) if y > ry else max(ry - step, y)
+        self.rect.topleft = (rx, ry)
+        if rx == x and ry == y:
+            self.route.pop()
+    
     def choose_new_direction(self, walls):
         # Try each direction until we find one that doesn't cause a collision
         possible_directions = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-        random.shuffle(possible_directions)
+        self.rng.shuffle(possible_directions)
         
         for direction in possible_directions:
             next_rect = self.rect.copy()
             next_rect.x += direction[0] * self.speed
             next_rect.y += direction[1] * self.speed
             
-            collision = False
-            for wall in walls:
-                if next_rect.colliderect(wall):
-                    collision = True
-                    break
-            
-            if not collision:
+            if not walls.collides(next_rect):
                 self.direction = direction
                 break
     
-    def draw(self, screen, scared=False):
+    def sprite_blit(self, scared=False, alpha=1.0):
         color = self.scared_color if scared else self.color
         
-        # Draw the main body (semi-circle)
-        pygame.draw.circle(screen, color, (self.rect.centerx, self.rect.centery - self.size//4), self.size//2)
-        
-        # Draw the lower part (wavy bottom)
-        wave_rect = pygame.Rect(
-            self.rect.x,
-            self.rect.centery - self.size//4,
-            self.size,
-            self.size//2
-        )
-        pygame.draw.rect(screen, color, wave_rect)
-        
-        # Draw the bottom waves
-        wave_height = self.size//6
-        wave_width = self.size//3
-        
-        for i in range(3):
-            x_start = self.rect.x + i * wave_width
-            pygame.draw.circle(
-                screen,
-                (0, 0, 0),  # Background color (for the gaps)
-                (x_start + wave_width//2, self.rect.bottom),
-                wave_height
-            )
-        
-        # Draw eyes
-        eye_size = self.size//5
-        eye_y = self.rect.centery - self.size//4
-        
-        # Eye whites
-        pygame.draw.circle(screen, (255, 255, 255), (self.rect.centerx - eye_size, eye_y), eye_size)
-        pygame.draw.circle(screen, (255, 255, 255), (self.rect.centerx + eye_size, eye_y), eye_size)
-        
-        # Eye pupils - position based on direction
-        pupil_offset_x = self.direction[0] * eye_size//2
-        pupil_offset_y = self.direction[1] * eye_size//2
-        
-        if scared:
-            pygame.draw.circle(screen, (0, 0, 0), (self.rect.centerx - eye_size, eye_y), eye_size//2)
-            pygame.draw.circle(screen, (0, 0, 0), (self.rect.centerx + eye_size, eye_y), eye_size//2)
-        else:
-            # Normal pupil eyes
-            pygame.draw.circle(
-                screen, 
-                (0, 0, 255), 
-                (self.rect.centerx - eye_size + pupil_offset_x, eye_y + pupil_offset_y), 
-                eye_size//2
-            )
-            pygame.draw.circle(
-                screen, 
-                (0, 0, 255), 
-                (self.rect.centerx + eye_size + pupil_offset_x, eye_y + pupil_offset_y), 
-                eye_size//2
-            )
+        # One pre-rendered sprite per appearance; the sprite has a margin
+        # around the ghost's rect for the head and the bottom waves
+        sprite, margin = get_ghost_sprite(self.size, color, scared, self.direction)
+        x, y = interpolate(self.previous_pos, self.rect.topleft, alpha)
+        return sprite, (x - margin, y - margin)
+    
+    def draw(self, screen, scared=False, alpha=1.0):
+        return screen.blit(*self.sprite_blit(scared, alpha))
 
 class Pellet:
-    def __init__(self, x, y, tile_size):
+    # One instance per pellet kind is shared by every tile of a PelletGrid;
+    # a pellet itself is just a byte in the grid, placed by its tile origin
+    __slots__ = ('size', 'inset')
+    
+    def __init__(self, tile_size):
         self.size = tile_size // 5
-        self.rect = pygame.Rect(
-            x + tile_size//2 - self.size//2,
-            y + tile_size//2 - self.size//2,
-            self.size,
-            self.size
-        )
+        self.inset = tile_size//2 - self.size//2
     
-    def draw(self, screen):
+    def rect_at(self, x, y):
+        return pygame.Rect(x + self.inset, y + self.inset, self.size, self.size)
+    
+    def draw(self, screen, x, y):
         pygame.draw.circle(
             screen,
             (255, 255, 255),
-            self.rect.center,
+            self.rect_at(x, y).center,
             self.size // 2
         )
 
 class PowerPellet:
-    def __init__(self, x, y, tile_size):
+    # Power pellets flash in step, so a single shared counter animates them all
+    __slots__ = ('size', 'inset', 'animation_counter', 'visible')
+    
+    def __init__(self, tile_size):
         self.size = tile_size // 2
-        self.rect = pygame.Rect(
-            x + tile_size//2 - self.size//2,
-            y + tile_size//2 - self.size//2,
-            self.size,
-            self.size
-        )
+        self.inset = tile_size//2 - self.size//2
         self.animation_counter = 0
         self.visible = True
     
-    def draw(self, screen):
+    def rect_at(self, x, y):
+        return pygame.Rect(x + self.inset, y + self.inset, self.size, self.size)
+    
+    def update(self):
         # Make the power pellet flash
         self.animation_counter += 1
         if self.animation_counter >= 30:
             self.animation_counter = 0
             self.visible = not self.visible
-        
+    
+    def draw(self, screen, x, y):
         if self.visible:
             pygame.draw.circle(
                 screen,
                 (255, 255, 255),
-                self.rect.center,
+                self.rect_at(x, y).center,
                 self.size // 2
-            )
\ No newline at end of file
+            )
+
+class PelletGrid:
+    # Pellet kinds stored per tile
+    EMPTY = 0
+    PELLET = 1
+    POWER = 2
+    
+    def __init__(self, cols, rows, offset_x, offset_y, tile_size):
+        self.cols = cols
+        self.rows = rows
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.tile_size = tile_size
+        
+        # One byte per tile holds the pellet kind, so lookups are O(1) and a
+        # pellet costs a byte; size and drawing come from the shared kinds
+        self.cells = bytearray(cols * rows)
+        self.power_pellet = PowerPellet(tile_size)
+        self.kinds = (None, Pellet(tile_size), self.power_pellet)
+        self.pellets_left = 0
+        self.power_pellets_left = 0
+    
+    @property
+    def remaining(self):
+        return self.pellets_left + self.power_pellets_left
+    
+    def tile_origin(self, index):
+        # Screen position of a tile's top-left corner
+        y, x = divmod(index, self.cols)
+        return self.offset_x + x * self.tile_size, self.offset_y + y * self.tile_size
+    
+    def add(self, x, y, kind):
+        index = y * self.cols + x
+        if kind == self.POWER:
+            self.power_pellets_left += 1
+        else:
+            self.pellets_left += 1
+        self.cells[index] = kind
+    
+    def eat(self, rect):
+        # Only the tiles under the box can hold a pellet it touches
+        first_col = max(0, (rect.x - self.offset_x) // self.tile_size)
+        first_row = max(0, (rect.y - self.offset_y) // self.tile_size)
+        last_col = min(self.cols - 1, (rect.right - 1 - self.offset_x) // self.tile_size)
+        last_row = min(self.rows - 1, (rect.bottom - 1 - self.offset_y) // self.tile_size)
+        
+        eaten = []
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                index = row * self.cols + col
+                kind = self.cells[index]
+                if kind and rect.colliderect(self.kinds[kind].rect_at(
+                        self.offset_x + col * self.tile_size, self.offset_y + row * self.tile_size)):
+                    self.cells[index] = self.EMPTY
+                    if kind == self.POWER:
+                        self.power_pellets_left -= 1
+                    else:
+                        self.pellets_left -= 1
+                    eaten.append(kind)
+        return eaten
+    
+    def update(self):
+        # Animate the power pellets that are still on the board
+        if self.power_pellets_left:
+            self.power_pellet.update()
+    
+    def get_state(self):
+        # The pellet mask is one byte per tile; power pellets add their flash state
+        return (
+            bytes(self.cells),
+            self.pellets_left,
+            self.power_pellets_left,
+            (self.power_pellet.animation_counter, self.power_pellet.visible)
+        )
+    
+    def set_state(self, state):
+        cells, self.pellets_left, self.power_pellets_left, flash = state
+        self.cells[:] = cells
+        self.power_pellet.animation_counter, self.power_pellet.visible = flash
+    
+    def __iter__(self):
+        # Remaining pellets in tile order, as (kind, x, y) with the tile origin
+        for index, kind in enumerate(self.cells):
+            if kind:
+                x, y = self.tile_origin(index)
+                yield self.kinds[kind], x, y
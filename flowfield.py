@@ -0,0 +1,92 @@
+# flowfield.py - Shared BFS flow field toward Pac-Man
+from array import array
+from collections import deque
+from entities import align_to_tile
+from tilegrid import DIRECTIONS, TileGrid
+
+# OPPOSITE[d] undoes DIRECTIONS[d]
+OPPOSITE = [1, 0, 3, 2]
+
+# Distance of tiles the search never reached (walls, cut-off areas)
+UNREACHED = 0xFFFF
+
+class FlowField:
+    def __init__(self, layout, offset_x, offset_y, tile_size):
+        # One breadth-first search from Pac-Man's tile tells every tile
+        # which way leads to him, so each ghost just reads its own tile
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.tile_size = tile_size
+        self.grid = TileGrid(layout)
+        self.rows = self.grid.rows
+        self.cols = self.grid.cols
+        self.walkable = self.grid.walkable
+        self.neighbors = self.grid.neighbors
+
+        # Per tile: steps to the source, and 1 + the DIRECTIONS index of
+        # the first step toward it (0 where there is no way)
+        self.distances = array('H', [UNREACHED]) * len(self.walkable)
+        self.directions = bytearray(len(self.walkable))
+        self.source = -1
+        self.rebuilds = 0
+
+    def tile_at(self, x, y):
+        # Walkable tile under a screen point, or -1
+        return self.grid.tile_at(x, y, self.offset_x, self.offset_y, self.tile_size)
+
+    def update(self, x, y):
+        # Re-run the search only when the point has moved to another tile
+        source = self.tile_at(x, y)
+        if source == self.source or source < 0:
+            return False
+
+        distances = array('H', [UNREACHED]) * len(self.walkable)
+        directions = bytearray(len(self.walkable))
+        neighbors = self.neighbors
+        distances[source] = 0
+        queue = deque([source])
+        while queue:
+            tile = queue.popleft()
+            step = distances[tile] + 1
+            for d, neighbor in enumerate(neighbors[tile]):
+                if neighbor >= 0 and distances[neighbor] == UNREACHED:
+                    distances[neighbor] = step
+                    directions[neighbor] = OPPOSITE[d] + 1
+                    queue.append(neighbor)
+
+        self.distances = distances
+        self.directions = directions
+        self.source = source
+        self.rebuilds += 1
+        return True
+
+    def toward(self, rect, target):
+        # Downhill to the source; the field only knows the way there, so
+        # any other target (a patrol point) gets None
+        if self.tile_at(*target) != self.source:
+            return None
+        here = self.tile_at(*rect.center)
+        if here < 0 or not self.directions[here]:
+            return None
+        step = DIRECTIONS[self.directions[here] - 1]
+        return align_to_tile(rect, step, self.offset_x, self.offset_y, self.tile_size)
+
+    def away(self, rect, threat, current=None):
+        # Uphill from the source, keeping the current direction on a tie
+        if self.tile_at(*threat) != self.source:
+            return None
+        here = self.tile_at(*rect.center)
+        if here < 0 or self.distances[here] == UNREACHED:
+            return None
+        best = None
+        best_distance = -1
+        for d, neighbor in enumerate(self.neighbors[here]):
+            if neighbor < 0:
+                continue
+            distance = self.distances[neighbor]
+            if distance > best_distance or (distance == best_distance and DIRECTIONS[d] == current):
+                best = DIRECTIONS[d]
+                best_distance = distance
+        if best is None:
+            return None
+        return align_to_tile(rect, best, self.offset_x, self.offset_y, self.tile_size)
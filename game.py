@@ -1,15 +1,71 @@
 # game.py - Core game mechanics
 import pygame
 import random
-from entities import PacMan, Ghost, Pellet, PowerPellet
-from level import load_level
+import hashlib
+from array import array
+from entities import PacMan, Ghost, PowerPellet, PelletGrid
+from level import Level, load_level, cell_rects
+from collision import CollisionGrid, SpatialHash
+from flowfield import FlowField
+from junctions import JunctionGraph, JunctionNavigator
+from reachability import Reachability
+from render import get_maze_layer, get_font, render_text
+
+# Screen size assumed for map placement when running without a display
+SCREEN_SIZE = (1400, 800)
+
+# Ghost colors, handed out in turn
+GHOST_COLORS = [(255, 0, 0), (255, 184, 255), (0, 255, 255), (255, 184, 82)]
+
+# Inputs accepted by Game.step: no change, then left, right, up and down
+ACTIONS = [None, (-1, 0), (1, 0), (0, -1), (0, 1)]
+
+# Input codes for Game.apply_input; 1-4 match the ACTIONS directions
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_UP = 3
+INPUT_DOWN = 4
+INPUT_STOP = 5
+INPUT_PAUSE = 6
+
+def pack_rng_state(state):
+    # A Mersenne Twister state is 625 32-bit words (the last is the
+    # position); as bytes it is a tenth the size of the tuple of ints
+    version, words, gauss_next = state
+    return version, array('I', words).tobytes(), gauss_next
+
+def unpack_rng_state(state):
+    version, words, gauss_next = state
+    return version, tuple(array('I', words)), gauss_next
 
 class Game:
-    def __init__(self, screen, level_num, level_complete_callback, game_over_callback):
+    def __init__(self, screen, level_num, level_complete_callback=None, game_over_callback=None, seed=None,
+                 vectorized_ghosts=False, horde=0, ghost_separation=False, navigation=None, levels=None):
+        # screen may be None to run the simulation headless (no display or fonts)
         self.screen = screen
+        
+        # Every random choice in the game comes from this stream, so the same
+        # seed and inputs replay exactly
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+        self.rng = random.Random(seed)
         self.level_num = level_num
         self.level_complete_callback = level_complete_callback
         self.game_over_callback = game_over_callback
+        self.vectorized_ghosts = vectorized_ghosts
+        
+        # Horde mode is a load test: horde ghosts on random open tiles
+        # instead of one per 'G', optionally kept from overlapping
+        self.horde = horde
+        self.ghost_separation = ghost_separation
+        
+        # How ghosts find their way: None for straight at the target,
+        # 'distances' for shortest paths from precomputed tables, 'flow'
+        # for a flow field toward Pac-Man shared by every ghost, or
+        # 'junctions' for arcade-style turns only at maze junctions (the
+        # vectorized ghosts keep their own movement)
+        self.navigation = navigation
         
         # Game properties
         self.score = 0
@@ -30,52 +86,82 @@ class Game:
             (255, 192, 203) # Level 10 - Pink
         ]
         
-        # Load level
-        self.map_data, self.wall_rects = load_level(level_num)
+        # Load level, from a LevelPack (levelpack.py) or LevelDirectory
+        # (level.py) when given, else from the built-in layouts
+        if levels:
+            self.level = levels.level(level_num)
+            self.map_data = self.level.rows
+        else:
+            self.map_data, self.wall_rects = load_level(level_num)
+            self.level = Level(self.map_data)
         self.tile_size = 20  # Size of each tile in the map
         
         # Calculate map offset to center it on screen
+        screen_width, screen_height = screen.get_size() if screen else SCREEN_SIZE
         map_width = len(self.map_data[0]) * self.tile_size
         map_height = len(self.map_data) * self.tile_size
-        self.map_offset_x = (screen.get_width() - map_width) // 2
-        self.map_offset_y = (screen.get_height() - map_height) // 2
+        self.map_offset_x = (screen_width - map_width) // 2
+        self.map_offset_y = (screen_height - map_height) // 2
         
         # Create game entities
         self.create_entities()
         
-        # Font for score display
-        self.font = pygame.font.SysFont('Arial', 24)
-        
         # Game state
         self.game_active = True
         self.power_pellet_active = False
         self.power_timer = 0
         
+        # How the game ended ('level_complete' or 'game_over') and the
+        # behavior of the ghost that last caught Pac-Man
+        self.outcome = None
+        self.caught_by = None
+        
+        # Number of update() calls so far, and callables told about every
+        # input as listener(tick, code)
+        self.tick = 0
+        self.input_listeners = []
+        
+        # Horde mode hashes the ghosts by position every tick, so Pac-Man
+        # and the ghosts are only tested against ghosts nearby; the number
+        # of rect tests run is kept for reporting
+        self.ghost_hash = SpatialHash(self.tile_size * 2) if self.horde else None
+        self.collision_tests = 0  # In the last tick
+        self.total_collision_tests = 0
+        
+        # Optional dirty-rect renderer, attached by PacManGame
+        self.renderer = None
+        self.hud_lines = [None, None, None]
+        self.hud_rects = [None, None, None]
+        
     def create_entities(self):
         # Create Pac-Man, ghosts, pellets based on the map data
         self.pacman = None
         self.ghosts = []
-        self.pellets = []
-        self.power_pellets = []
-        
-        # Parse the map_data to create entities
-        for y, row in enumerate(self.map_data):
-            for x, cell in enumerate(row):
-                # Convert grid position to screen position
-                screen_x = self.map_offset_x + x * self.tile_size
-                screen_y = self.map_offset_y + y * self.tile_size
-                
-                if cell == 'P':  # Pac-Man
-                    self.pacman = PacMan(screen_x, screen_y, self.tile_size)
-                elif cell == 'G':  # Ghost
-                    # Create ghosts with different colors and behaviors
-                    ghost_colors = [(255, 0, 0), (255, 184, 255), (0, 255, 255), (255, 184, 82)]
-                    color = ghost_colors[len(self.ghosts) % len(ghost_colors)]
-                    self.ghosts.append(Ghost(screen_x, screen_y, self.tile_size, color))
-                elif cell == '.':  # Pellet
-                    self.pellets.append(Pellet(screen_x, screen_y, self.tile_size))
-                elif cell == 'O':  # Power Pellet
-                    self.power_pellets.append(PowerPellet(screen_x, screen_y, self.tile_size))
+        self.pellet_grid = PelletGrid(
+            max(len(row) for row in self.map_data),
+            len(self.map_data),
+            self.map_offset_x,
+            self.map_offset_y,
+            self.tile_size
+        )
+        
+        # Place the entities at the level's spawn points and pellet tiles
+        if self.level.pacman:
+            x, y = self.level.pacman
+            self.pacman = PacMan(self.map_offset_x + x * self.tile_size, self.map_offset_y + y * self.tile_size, self.tile_size)
+        if not self.horde:
+            for x, y in self.level.ghosts:
+                # Create ghosts with different colors and behaviors
+                color = GHOST_COLORS[len(self.ghosts) % len(GHOST_COLORS)]
+                self.ghosts.append(Ghost(self.map_offset_x + x * self.tile_size, self.map_offset_y + y * self.tile_size,
+                                         self.tile_size, color, self.rng))
+        for x, y in self.level.pellets:
+            self.pellet_grid.add(x, y, PelletGrid.PELLET)
+        for x, y in self.level.power_pellets:
+            self.pellet_grid.add(x, y, PelletGrid.POWER)
+        
+        if self.horde:
+            self.spawn_horde()
         
         # Create outer boundary walls with correct offsets
         map_width = len(self.map_data[0]) * self.tile_size
@@ -94,32 +180,56 @@ class Game:
                        15, map_height + (boundary_offset * 2))  # Right
         ]
         
-        # Add maze walls with correct offsets
-        for y, row in enumerate(self.map_data):
-            for x, cell in enumerate(row):
-                if cell == 'W':
-                    wall_rect = pygame.Rect(
-                        self.map_offset_x + x * self.tile_size + 2.5,  # Shift right by 2.5 pixels
-                        self.map_offset_y + y * self.tile_size + 2.5,  # Shift down by 2.5 pixels
-                        15,  # Width of 15
-                        15   # Height of 15
-                    )
-                    self.wall_rects.append(wall_rect)
+        # Maze walls are drawn cell by cell, but collide as merged runs
+        self.wall_cells = self.wall_rects + cell_rects(
+            self.level.wall_cells, self.map_offset_x, self.map_offset_y, self.tile_size)
+        # Digest of the walls, to find the cached maze layer
+        self.walls_key = hashlib.sha1(repr([tuple(cell) for cell in self.wall_cells]).encode()).hexdigest()
+        self.wall_rects += cell_rects(self.level.wall_blocks, self.map_offset_x, self.map_offset_y, self.tile_size)
+        
+        # Index the walls by tile so movement tests only look at nearby walls
+        self.wall_grid = CollisionGrid(self.wall_rects, self.tile_size)
+        
+        self.flow_field = None
+        if self.navigation == 'distances':
+            from pathfinding import DistanceTable, TileNavigator, load_distance_table  # Needs NumPy
+            if self.level.distances is not None:
+                table = DistanceTable(self.map_data, self.level.distances)
+            else:
+                table = load_distance_table(self.map_data)
+            navigator = TileNavigator(table, self.map_offset_x, self.map_offset_y, self.tile_size)
+            for ghost in self.ghosts:
+                ghost.navigator = navigator
+        elif self.navigation == 'flow':
+            self.flow_field = FlowField(self.map_data, self.map_offset_x, self.map_offset_y, self.tile_size)
+            for ghost in self.ghosts:
+                ghost.navigator = self.flow_field
+        elif self.navigation == 'junctions':
+            navigator = JunctionNavigator(JunctionGraph(self.map_data), self.map_offset_x, self.map_offset_y, self.tile_size)
+            for ghost in self.ghosts:
+                ghost.junctions = navigator
+        
+        # Optionally move the ghosts into NumPy arrays updated all at once;
+        # the Ghost objects above only seed it
+        self.ghost_manager = None
+        if self.vectorized_ghosts:
+            from ghosts import GhostManager  # NumPy is only needed for this mode
+            self.ghost_manager = GhostManager.from_ghosts(self.ghosts, self.wall_rects, self.rng.getrandbits(64), self.flow_field)
     
     def handle_event(self, event):
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_ESCAPE:
-                self.paused = not self.paused
+                self.apply_input(INPUT_PAUSE)
             elif self.pacman and not self.paused:
                 # Handle arrow key controls for Pac-Man
                 if event.key == pygame.K_LEFT:
-                    self.pacman.set_direction(-1, 0)
+                    self.apply_input(INPUT_LEFT)
                 elif event.key == pygame.K_RIGHT:
-                    self.pacman.set_direction(1, 0)
+                    self.apply_input(INPUT_RIGHT)
                 elif event.key == pygame.K_UP:
-                    self.pacman.set_direction(0, -1)
+                    self.apply_input(INPUT_UP)
                 elif event.key == pygame.K_DOWN:
-                    self.pacman.set_direction(0, 1)
+                    self.apply_input(INPUT_DOWN)
         elif event.type == pygame.KEYUP and self.pacman and not self.paused:
             # Keep the current direction when key is released
             if event.key in [pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN]:
@@ -128,55 +238,89 @@ class Game:
                    (event.key == pygame.K_RIGHT and self.pacman.direction == (1, 0)) or \
                    (event.key == pygame.K_UP and self.pacman.direction == (0, -1)) or \
                    (event.key == pygame.K_DOWN and self.pacman.direction == (0, 1)):
-                    self.pacman.set_direction(0, 0)
-                    self.pacman.moving = False
+                    self.apply_input(INPUT_STOP)
+    
+    def apply_input(self, code):
+        # Every control change goes through here, so recording the codes
+        # with their tick is enough to replay a game
+        if code == INPUT_PAUSE:
+            self.paused = not self.paused
+            if self.renderer:
+                # The pause overlay covers the middle of the screen
+                self.renderer.mark_all()
+        elif code == INPUT_STOP:
+            self.pacman.set_direction(0, 0)
+            self.pacman.moving = False
+        else:
+            self.pacman.set_direction(*ACTIONS[code])
+        
+        for listener in self.input_listeners:
+            listener(self.tick, code)
     
     def update(self):
+        self.tick += 1
         if self.paused or not self.game_active:
+            self.hold_positions()
             return
             
         # Update Pac-Man
         if self.pacman:
-            self.pacman.update(self.wall_rects)
-            
-            # Check for pellet collisions
-            for pellet in self.pellets[:]:
-                if self.pacman.rect.colliderect(pellet.rect):
-                    self.pellets.remove(pellet)
-                    self.score += 10
+            self.pacman.update(self.wall_grid)
             
-            # Check for power pellet collisions
-            for power_pellet in self.power_pellets[:]:
-                if self.pacman.rect.colliderect(power_pellet.rect):
-                    self.power_pellets.remove(power_pellet)
+            # Check for pellet and power pellet collisions on Pac-Man's tiles
+            eaten = self.pellet_grid.eat(self.pacman.rect)
+            if eaten and self.renderer:
+                # Eaten pellets sit on the tiles around Pac-Man
+                self.renderer.mark(self.pacman.rect.inflate(self.tile_size * 2, self.tile_size * 2))
+            for kind in eaten:
+                if kind == PelletGrid.POWER:
                     self.score += 50
                     self.power_pellet_active = True
-                    self.power_timer = 300  # 5 seconds at 60 FPS
+                    self.power_timer = 300  # 5 seconds at 60 ticks per second
+                else:
+                    self.score += 10
             
             # Check for ghost collisions
-            for ghost in self.ghosts:
-                if self.pacman.rect.colliderect(ghost.rect):
+            if self.ghost_manager or self.ghost_hash:
+                for index in self.touching_ghosts():
                     if self.power_pellet_active:
-                        # Eat the ghost
-                        ghost.reset()
+                        self.reset_ghost(index)
                         self.score += 200
                     else:
-                        # Lose a life
-                        self.lives -= 1
-                        if self.lives <= 0:
-                            self.game_active = False
-                            self.game_over_callback(self.score)
+                        # Everyone is back at the start (or the game is over)
+                        self.lose_life(self.ghost_behavior(index))
+                        break
+            else:
+                for ghost in self.ghosts:
+                    if self.pacman.rect.colliderect(ghost.rect):
+                        if self.power_pellet_active:
+                            # Eat the ghost
+                            ghost.reset()
+                            self.score += 200
                         else:
-                            self.reset_positions()
+                            self.lose_life(ghost.behavior_type)
+        
+        # Adjust ghost behavior based on power pellet
+        scared = self.power_pellet_active
+        if scared and self.power_timer < 60:  # Flash during the last second (60 ticks)
+            scared = self.power_timer % 10 < 5
+        
+        # One search from Pac-Man's tile serves every ghost; it only reruns
+        # when he reaches another tile
+        if self.flow_field and self.pacman:
+            self.flow_field.update(*self.pacman.rect.center)
         
         # Update ghosts
-        for ghost in self.ghosts:
-            # Adjust ghost behavior based on power pellet
-            scared = self.power_pellet_active
-            if scared and self.power_timer < 60:  # Flash during the last second
-                scared = self.power_timer % 10 < 5
-            
-            ghost.update(self.wall_rects, self.pacman, scared)
+        if self.ghost_manager:
+            self.ghost_manager.update(self.pacman, scared)
+        else:
+            for ghost in self.ghosts:
+                ghost.update(self.wall_grid, self.pacman, scared)
+        if self.ghost_hash and self.ghost_separation:
+            self.separate_ghosts()
+        if self.ghost_hash:
+            self.collision_tests = self.ghost_hash.reset_tests()
+            self.total_collision_tests += self.collision_tests
         
         # Update power pellet timer
         if self.power_pellet_active:
@@ -184,55 +328,248 @@ class Game:
             if self.power_timer <= 0:
                 self.power_pellet_active = False
         
-        # Check if level is complete (all pellets eaten)
-        if len(self.pellets) == 0 and len(self.power_pellets) == 0:
+        # Flash the power pellets
+        self.pellet_grid.update()
+        
+        # Check if level is complete (all the pellets Pac-Man can reach eaten)
+        if self.pellet_grid.remaining <= self.level.unreachable_pellets:
             self.game_active = False
-            self.level_complete_callback(self.score)
+            self.outcome = 'level_complete'
+            if self.level_complete_callback:
+                self.level_complete_callback(self.score)
+    
+    def hold_positions(self):
+        # Nothing moved this tick, so the last tick starts where everything
+        # stands; otherwise drawing keeps sliding between the old positions
+        if self.pacman:
+            self.pacman.previous_pos = self.pacman.rect.topleft
+        if self.ghost_manager:
+            self.ghost_manager.previous = self.ghost_manager.pos.copy()
+        else:
+            for ghost in self.ghosts:
+                ghost.previous_pos = ghost.rect.topleft
+    
+    def spawn_horde(self):
+        # Spread the horde at random over the tiles Pac-Man can reach,
+        # leaving him a few tiles of room where the maze is big enough;
+        # with more ghosts than tiles some have to share
+        report = Reachability(self.map_data)
+        open_tiles = sorted(report.reachable or report.walkable, key=lambda tile: (tile[1], tile[0]))
+        tiles = open_tiles
+        if self.pacman:
+            start_x = (self.pacman.start_x - self.map_offset_x) // self.tile_size
+            start_y = (self.pacman.start_y - self.map_offset_y) // self.tile_size
+            tiles = [
+                (x, y) for x, y in open_tiles
+                if not (abs(x - start_x) <= 4 and abs(y - start_y) <= 4)
+            ] or open_tiles
+        if not tiles:
+            return
+        if self.horde <= len(tiles):
+            tiles = self.rng.sample(tiles, self.horde)
+        else:
+            tiles = self.rng.choices(tiles, k=self.horde)
+        
+        for i, (x, y) in enumerate(tiles):
+            screen_x = self.map_offset_x + x * self.tile_size
+            screen_y = self.map_offset_y + y * self.tile_size
+            color = GHOST_COLORS[i % len(GHOST_COLORS)]
+            self.ghosts.append(Ghost(screen_x, screen_y, self.tile_size, color, self.rng))
+    
+    def ghost_rects(self):
+        # Current ghost boxes, whichever way the ghosts are stored
+        if self.ghost_manager:
+            size = self.ghost_manager.size
+            return [pygame.Rect(x, y, size, size) for x, y in self.ghost_manager.positions()]
+        return [ghost.rect for ghost in self.ghosts]
+    
+    def hash_ghosts(self):
+        self.ghost_hash.clear()
+        for index, rect in enumerate(self.ghost_rects()):
+            self.ghost_hash.insert(index, rect)
+    
+    def touching_ghosts(self):
+        # Indexes of the ghosts overlapping Pac-Man
+        if self.ghost_hash:
+            self.hash_ghosts()
+            return self.ghost_hash.query(self.pacman.rect)
+        return self.ghost_manager.touching(self.pacman.rect)
+    
+    def reset_ghost(self, index):
+        if self.ghost_manager:
+            self.ghost_manager.reset(index)
+        else:
+            self.ghosts[index].reset()
+    
+    def ghost_behavior(self, index):
+        if self.ghost_manager:
+            return self.ghost_manager.behavior_type(index)
+        return self.ghosts[index].behavior_type
+    
+    def separate_ghosts(self):
+        # Ghosts that walked into each other this tick both step back, which
+        # can bump into others, so repeat until nothing new overlaps; ghosts
+        # that already overlapped (as on a shared spawn tile) drift apart freely
+        if self.ghost_manager:
+            manager = self.ghost_manager
+            previous = [pygame.Rect(x, y, manager.size, manager.size) for x, y in manager.previous.tolist()]
+        else:
+            previous = [pygame.Rect(ghost.previous_pos, ghost.rect.size) for ghost in self.ghosts]
+        
+        stepped_back = True
+        while stepped_back:
+            stepped_back = False
+            self.hash_ghosts()
+            for a, b in self.ghost_hash.pairs():
+                if not previous[a].colliderect(previous[b]):
+                    for index in (a, b):
+                        stepped_back |= self.undo_ghost_move(index)
+    
+    def undo_ghost_move(self, index):
+        # Put a ghost back where it started the tick; False if it is there already
+        if self.ghost_manager:
+            pos, previous = self.ghost_manager.pos, self.ghost_manager.previous
+            if (pos[index] == previous[index]).all():
+                return False
+            pos[index] = previous[index]
+        else:
+            ghost = self.ghosts[index]
+            if ghost.rect.topleft == ghost.previous_pos:
+                return False
+            ghost.rect.topleft = ghost.previous_pos
+        return True
+    
+    def lose_life(self, behavior_type):
+        # Pac-Man was caught by a ghost with the given behavior
+        self.lives -= 1
+        self.caught_by = behavior_type
+        if self.lives <= 0:
+            self.game_active = False
+            self.outcome = 'game_over'
+            if self.game_over_callback:
+                self.game_over_callback(self.score)
+        else:
+            self.reset_positions()
+    
+    def step(self, action=0):
+        # Advance the simulation by one tick with an index into ACTIONS;
+        # returns the new state, the score gained and whether the game ended
+        if action and self.pacman:
+            self.apply_input(action)
+        
+        score = self.score
+        self.update()
+        return self.get_state(), self.score - score, not self.game_active
+    
+    def snapshot(self):
+        # Full simulation state as a small immutable tuple; cheap enough to
+        # take every tick for search or rewind
+        return (
+            self.tick, self.score, self.lives, self.paused, self.game_active,
+            self.power_pellet_active, self.power_timer, self.outcome, self.caught_by,
+            self.pacman.get_state() if self.pacman else None,
+            self.ghost_manager.get_state() if self.ghost_manager else tuple(ghost.get_state() for ghost in self.ghosts),
+            self.pellet_grid.get_state(),
+            pack_rng_state(self.rng.getstate())
+        )
+    
+    def restore(self, snapshot):
+        # Put the game back exactly as it was when snapshot() was taken
+        (self.tick, self.score, self.lives, self.paused, self.game_active,
+         self.power_pellet_active, self.power_timer, self.outcome, self.caught_by,
+         pacman_state, ghost_states, pellet_state, rng_state) = snapshot
+        if self.pacman:
+            self.pacman.set_state(pacman_state)
+        if self.ghost_manager:
+            self.ghost_manager.set_state(ghost_states)
+        else:
+            for ghost, ghost_state in zip(self.ghosts, ghost_states):
+                ghost.set_state(ghost_state)
+        self.pellet_grid.set_state(pellet_state)
+        self.rng.setstate(unpack_rng_state(rng_state))
+        if self.renderer:
+            self.renderer.mark_all()
+    
+    def get_state(self):
+        # Plain-data view of the simulation, independent of any drawing
+        return {
+            'pacman': (self.pacman.rect.x, self.pacman.rect.y) if self.pacman else None,
+            'pacman_direction': self.pacman.direction if self.pacman else (0, 0),
+            'ghosts': self.ghost_manager.positions() if self.ghost_manager else [(ghost.rect.x, ghost.rect.y) for ghost in self.ghosts],
+            'score': self.score,
+            'lives': self.lives,
+            'pellets_left': self.pellet_grid.remaining,
+            'power_pellet_active': self.power_pellet_active,
+            'power_timer': self.power_timer,
+            'game_active': self.game_active
+        }
     
     def reset_positions(self):
         # Reset Pac-Man and ghosts to their starting positions
         if self.pacman:
             self.pacman.reset()
-        for ghost in self.ghosts:
-            ghost.reset()
+        if self.ghost_manager:
+            self.ghost_manager.reset_positions()
+        else:
+            for ghost in self.ghosts:
+                ghost.reset()
     
-    def draw(self):
+    def draw(self, alpha=1.0):
+        # alpha places moving entities between the last two ticks
         # Get the wall color for the current level
-        wall_color = self.wall_colors[self.level_num - 1]
-        
-        # Draw maze walls
-        for wall_rect in self.wall_rects:
-            # Draw walls with the map offset and level-specific color
-            pygame.draw.rect(self.screen, wall_color, wall_rect)
+        wall_color = self.wall_colors[(self.level_num - 1) % len(self.wall_colors)]
         
-        # Draw pellets
-        for pellet in self.pellets:
-            pellet.draw(self.screen)
+        # Draw maze walls (and the outer boundary) from the cached layer
+        maze_layer, maze_pos = get_maze_layer(self.walls_key, wall_color, self.wall_cells)
+        self.screen.blit(maze_layer, maze_pos)
         
-        # Draw power pellets
-        for power_pellet in self.power_pellets:
-            power_pellet.draw(self.screen)
+        # Draw pellets and power pellets
+        for pellet, x, y in self.pellet_grid:
+            pellet.draw(self.screen, x, y)
+            if self.renderer and isinstance(pellet, PowerPellet):
+                # Power pellets flash, so their area changes on its own
+                self.renderer.mark(pellet.rect_at(x, y))
         
         # Draw ghosts
-        for ghost in self.ghosts:
-            ghost.draw(self.screen, self.power_pellet_active)
+        if self.ghost_manager:
+            ghost_rects = self.ghost_manager.draw(self.screen, self.power_pellet_active, alpha)
+        else:
+            # One batched blit call for every ghost
+            ghost_rects = self.screen.blits([ghost.sprite_blit(self.power_pellet_active, alpha) for ghost in self.ghosts])
+        if self.renderer:
+            for ghost_rect in ghost_rects:
+                self.renderer.add_sprite(ghost_rect)
         
         # Draw Pac-Man
         if self.pacman:
-            self.pacman.draw(self.screen)
+            pacman_rect = self.pacman.draw(self.screen, alpha)
+            if self.renderer:
+                self.renderer.add_sprite(pacman_rect)
         
         # Draw score and lives
-        score_text = self.font.render(f"Score: {self.score}", True, (255, 255, 255))
-        lives_text = self.font.render(f"Lives: {self.lives}", True, (255, 255, 255))
-        level_text = self.font.render(f"Level: {self.level_num}", True, (255, 255, 255))
-        
-        self.screen.blit(score_text, (20, 20))
-        self.screen.blit(lives_text, (20, 50))
-        self.screen.blit(level_text, (20, 80))
+        font = get_font('Arial', 24)
+        hud_lines = [f"Score: {self.score}", f"Lives: {self.lives}", f"Level: {self.level_num}"]
+        for i, line in enumerate(hud_lines):
+            text = render_text(font, line, (255, 255, 255))
+            if self.renderer:
+                # Nothing clears the HUD between frames in dirty-rect mode
+                old_rect = self.hud_rects[i]
+                if old_rect:
+                    self.screen.fill((0, 0, 0), old_rect)
+                text_rect = self.screen.blit(text, (20, 20 + i * 30))
+                if line != self.hud_lines[i]:
+                    if old_rect:
+                        self.renderer.mark(old_rect)
+                    self.renderer.mark(text_rect)
+                self.hud_lines[i] = line
+                self.hud_rects[i] = text_rect
+            else:
+                self.screen.blit(text, (20, 20 + i * 30))
         
         # Draw paused message if game is paused
         if self.paused:
-            paused_font = pygame.font.SysFont('Arial', 48)
-            paused_text = paused_font.render("PAUSED", True, (255, 255, 255))
+            paused_text = render_text(get_font('Arial', 48), "PAUSED", (255, 255, 255))
             text_rect = paused_text.get_rect(center=(self.screen.get_width()//2, self.screen.get_height()//2))
-            self.screen.blit(paused_text, text_rect)
\ No newline at end of file
+            self.screen.blit(paused_text, text_rect)
+            if self.renderer:
+                self.renderer.mark(text_rect)
\ No newline at end of file
@@ -0,0 +1,296 @@
+# ghosts.py - Struct-of-arrays ghost system updated with NumPy
+import os
+import argparse
+import random
+import time
+import numpy as np
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from entities import Ghost
+from flowfield import UNREACHED
+from render import get_ghost_sprite
+from tilegrid import DIRECTIONS as TILE_DIRECTIONS
+
+# Ghost behavior codes
+CHASE = 0
+RANDOM = 1
+PATROL = 2
+BEHAVIORS = ["chase", "random", "patrol"]
+
+# Candidate directions tried by ghosts after hitting a wall, in the
+# order the flow field numbers them
+DIRECTIONS = np.array(TILE_DIRECTIONS)
+
+# Steps for the flow field's direction codes (0 is no way)
+FLOW_STEPS = np.vstack([(0, 0), DIRECTIONS])
+
+class FreeMask:
+    def __init__(self, wall_rects, size):
+        # free[y, x] is True when a size x size box with its top-left corner
+        # at (x, y) + origin touches no wall; one lookup replaces a
+        # rect-vs-walls test and works on whole arrays at once
+        self.size = size
+        left = min(rect.left for rect in wall_rects) - size
+        top = min(rect.top for rect in wall_rects) - size
+        right = max(rect.right for rect in wall_rects) + size
+        bottom = max(rect.bottom for rect in wall_rects) + size
+
+        walls = np.zeros((bottom - top, right - left), dtype=np.int32)
+        for rect in wall_rects:
+            walls[rect.top - top:rect.bottom - top, rect.left - left:rect.right - left] = 1
+
+        # Summed-area table gives the wall pixel count under any box
+        summed = np.zeros((walls.shape[0] + 1, walls.shape[1] + 1), dtype=np.int32)
+        summed[1:, 1:] = walls.cumsum(0).cumsum(1)
+        box_sum = summed[size:, size:] - summed[:-size, size:] - summed[size:, :-size] + summed[:-size, :-size]
+
+        self.free = box_sum == 0
+        self.origin = np.array([left, top], dtype=np.int64)
+
+    def is_free(self, xy):
+        # xy holds integer top-left corners in screen space, last axis (x, y)
+        local = xy - self.origin
+        x = np.clip(local[..., 0], 0, self.free.shape[1] - 1)
+        y = np.clip(local[..., 1], 0, self.free.shape[0] - 1)
+        return self.free[y, x]
+
+def cardinal(offset):
+    # Reduce an offset to the dominant cardinal direction, like Ghost.chase_pacman
+    dx = offset[..., 0]
+    dy = offset[..., 1]
+    horizontal = np.abs(dx) > np.abs(dy)
+    result = np.zeros(offset.shape, dtype=np.int64)
+    result[..., 0] = np.where(horizontal, np.where(dx > 0, 1, -1), 0)
+    result[..., 1] = np.where(horizontal, 0, np.where(dy > 0, 1, -1))
+    return result
+
+class GhostManager:
+    def __init__(self, starts, size, colors, behaviors, patrol_points, wall_rects, seed=None, flow_field=None):
+        # Every ghost is a row in the same arrays, so a tick costs a fixed
+        # number of NumPy calls however many ghosts there are
+        self.size = size
+        self.colors = list(colors)
+        self.start = np.array(starts, dtype=np.int64).reshape(-1, 2)
+        self.behavior = np.array(behaviors, dtype=np.int64)
+        self.patrol_points = np.array(patrol_points, dtype=np.int64).reshape(-1, 4, 2)
+        self.patrol_index = np.zeros(len(self.start), dtype=np.int64)
+        self.free_mask = FreeMask(wall_rects, size)
+        self.rng = np.random.default_rng(seed)
+
+        # Optional flow field toward Pac-Man for chasing and fleeing
+        self.flow_field = flow_field
+        if flow_field:
+            self.flow_neighbors = np.array(flow_field.neighbors, dtype=np.int64)
+
+        count = len(self.start)
+        self.pos = np.zeros((count, 2), dtype=np.int64)
+        self.previous = np.zeros((count, 2), dtype=np.int64)
+        self.dir = np.zeros((count, 2), dtype=np.int64)
+        self.speed = np.zeros(count, dtype=np.float64)
+        self.reset_positions()
+
+    @classmethod
+    def from_ghosts(cls, ghosts, wall_rects, seed=None, flow_field=None):
+        # Take over the ghosts a Game built from its map
+        return cls(
+            [(ghost.start_x, ghost.start_y) for ghost in ghosts],
+            ghosts[0].size if ghosts else 20,
+            [ghost.color for ghost in ghosts],
+            [BEHAVIORS.index(ghost.behavior_type) for ghost in ghosts],
+            [ghost.patrol_points for ghost in ghosts],
+            wall_rects,
+            seed,
+            flow_field
+        )
+
+    def __len__(self):
+        return len(self.start)
+
+    def reset(self, index):
+        # Send ghosts (an index or a mask) back to their starting positions
+        self.pos[index] = self.start[index]
+        self.previous[index] = self.start[index]
+        self.dir[index] = 0
+        self.speed[index] = 0.8
+
+    def reset_positions(self):
+        self.reset(slice(None))
+
+    def behavior_type(self, index):
+        return BEHAVIORS[self.behavior[index]]
+
+    def positions(self):
+        return [tuple(xy) for xy in self.pos.tolist()]
+
+    def touching(self, rect):
+        # Indexes of the ghosts overlapping rect, the same test as Rect.colliderect
+        x, y = self.pos[:, 0], self.pos[:, 1]
+        hit = (x < rect.right) & (rect.x < x + self.size) & (y < rect.bottom) & (rect.y < y + self.size)
+        return np.flatnonzero(hit).tolist()
+
+    def update(self, pacman, scared=False):
+        if not len(self):
+            return
+        self.previous = self.pos.copy()
+        heading = self.dir
+
+        half = self.size // 2
+        center = self.pos + half
+        pacman_center = np.array(pacman.rect.center, dtype=np.int64)
+
+        # Patrolling ghosts move on once they reach their point
+        target = self.patrol_points[np.arange(len(self)), self.patrol_index]
+        to_target = target - center
+        arrived = (self.behavior == PATROL) & (np.abs(to_target) < 10).all(1)
+        if scared:
+            # Every ghost runs away from Pac-Man
+            self.dir = cardinal(center - pacman_center)
+        else:
+            self.patrol_index = np.where(arrived, (self.patrol_index + 1) % 4, self.patrol_index)
+
+            # Chasers head for Pac-Man and patrollers for their point
+            offset = np.where((self.behavior == PATROL)[:, None], to_target, pacman_center - center)
+            steer = (self.behavior == CHASE) | ((self.behavior == PATROL) & ~arrived)
+            self.dir = np.where(steer[:, None], cardinal(offset), self.dir)
+
+            wander = (self.behavior == RANDOM) & (self.rng.random(len(self)) < 0.02)
+            if wander.any():
+                self.dir[wander] = DIRECTIONS[self.rng.integers(0, 4, size=int(wander.sum()))]
+
+        # The flow field takes over chasing, and fleeing for every ghost,
+        # wherever it has a way; it only knows the way to Pac-Man's tile
+        field = self.flow_field
+        if field and field.tile_at(*pacman.rect.center) == field.source:
+            steps, found = self.flow_steps(scared, heading)
+            follow = found if scared else found & (self.behavior == CHASE)
+            self.dir = np.where(follow[:, None], steps, self.dir)
+
+        # Move, rounding like pygame does when adding floats to a Rect
+        speed = self.speed * 0.3 if scared else self.speed
+        candidate = np.floor(self.pos + self.dir * speed[:, None] + 0.5).astype(np.int64)
+        clear = self.free_mask.is_free(candidate)
+        self.pos = np.where(clear[:, None], candidate, self.pos)
+
+        # Blocked ghosts take the first open direction in a random order
+        blocked = ~clear
+        if blocked.any():
+            position = self.pos[blocked]
+            order = np.argsort(self.rng.random((len(position), 4)), axis=1)
+            tries = DIRECTIONS[order]
+            steps = np.floor(position[:, None, :] + tries * self.speed[blocked][:, None, None] + 0.5).astype(np.int64)
+            open_ = self.free_mask.is_free(steps)
+            first = open_.argmax(1)
+            chosen = np.where(open_.any(1)[:, None], tries[np.arange(len(position)), first], self.dir[blocked])
+            self.dir[blocked] = chosen
+
+    def flow_steps(self, scared, heading):
+        # Each ghost's step from the flow field, downhill or uphill when
+        # scared (keeping heading on a tie), lined up with its tile like
+        # FlowField.toward and away
+        field = self.flow_field
+        tile_size = field.tile_size
+        center = self.pos + self.size // 2
+        col = (center[:, 0] - field.offset_x) // tile_size
+        row = (center[:, 1] - field.offset_y) // tile_size
+        inside = (col >= 0) & (col < field.cols) & (row >= 0) & (row < field.rows)
+        tile = np.where(inside, row * field.cols + col, 0)
+        distances = np.frombuffer(field.distances, dtype=np.uint16)
+
+        if scared:
+            # The farthest neighbor wins, the current heading on a tie
+            neighbors = self.flow_neighbors[tile]
+            reach = np.where(neighbors >= 0, distances[np.maximum(neighbors, 0)].astype(np.int64), -1)
+            keep = (DIRECTIONS[None, :, :] == heading[:, None, :]).all(2)
+            score = np.where(reach >= 0, reach * 2 + keep, -1)
+            steps = DIRECTIONS[score.argmax(1)]
+            found = inside & (distances[tile] != UNREACHED) & (score.max(1) >= 0)
+        else:
+            codes = np.frombuffer(field.directions, dtype=np.uint8)[tile].astype(np.int64)
+            steps = FLOW_STEPS[codes]
+            found = inside & (codes > 0)
+
+        # Slide onto the tile's row or column before turning
+        line_x = field.offset_x + col * tile_size
+        line_y = field.offset_y + row * tile_size
+        horizontal = steps[:, 0] != 0
+        off_row = horizontal & (self.pos[:, 1] != line_y)
+        off_column = ~horizontal & (self.pos[:, 0] != line_x)
+        steps = steps.copy()
+        steps[off_row] = np.stack([np.zeros(off_row.sum(), dtype=np.int64), np.sign(line_y - self.pos[:, 1])[off_row]], 1)
+        steps[off_column] = np.stack([np.sign(line_x - self.pos[:, 0])[off_column], np.zeros(off_column.sum(), dtype=np.int64)], 1)
+        return steps, found
+
+    def get_state(self):
+        # Positions and headings as bytes; behaviors, starts and patrol
+        # points never change, so they are left out
+        return (
+            self.pos.tobytes(), self.previous.tobytes(), self.dir.tobytes(),
+            self.speed.tobytes(), self.patrol_index.tobytes(), self.rng.bit_generator.state
+        )
+
+    def set_state(self, state):
+        pos, previous, direction, speed, patrol_index, rng_state = state
+        self.pos = np.frombuffer(pos, dtype=np.int64).reshape(-1, 2).copy()
+        self.previous = np.frombuffer(previous, dtype=np.int64).reshape(-1, 2).copy()
+        self.dir = np.frombuffer(direction, dtype=np.int64).reshape(-1, 2).copy()
+        self.speed = np.frombuffer(speed, dtype=np.float64).copy()
+        self.patrol_index = np.frombuffer(patrol_index, dtype=np.int64).copy()
+        self.rng.bit_generator.state = rng_state
+
+    def draw(self, screen, scared=False, alpha=1.0):
+        # One batched blit call for every ghost; returns the blitted areas
+        if not len(self):
+            return []
+        drawn = np.round(self.previous + (self.pos - self.previous) * alpha).astype(np.int64)
+        blits = []
+        for color, (x, y), direction in zip(self.colors, drawn.tolist(), self.dir.tolist()):
+            sprite, margin = get_ghost_sprite(self.size, Ghost.scared_color if scared else color, scared, tuple(direction))
+            blits.append((sprite, (x - margin, y - margin)))
+        return screen.blits(blits)
+
+def spawn_ghosts(game, count, rng):
+    # count ghosts spread over the level's ghost starts, with random
+    # behaviors and patrol points as Ghost would pick them
+    starts = [(ghost.start_x, ghost.start_y) for ghost in game.ghosts]
+    ghosts = []
+    for i in range(count):
+        x, y = starts[i % len(starts)]
+        ghosts.append(Ghost(x, y, game.tile_size, game.ghosts[i % len(starts)].color, rng))
+    return ghosts
+
+def benchmark(level_num=1, counts=(4, 16, 64, 256, 1000), ticks=300, seed=0):
+    # Milliseconds per tick for the per-object ghosts and the manager
+    from game import Game
+
+    results = []
+    for count in counts:
+        game = Game(None, level_num, seed=seed)
+        ghosts = spawn_ghosts(game, count, random.Random(seed))
+        manager = GhostManager.from_ghosts(ghosts, game.wall_rects, seed)
+
+        start = time.perf_counter()
+        for tick in range(ticks):
+            for ghost in ghosts:
+                ghost.update(game.wall_grid, game.pacman)
+        scalar = (time.perf_counter() - start) / ticks * 1000
+
+        start = time.perf_counter()
+        for tick in range(ticks):
+            manager.update(game.pacman)
+        vectorized = (time.perf_counter() - start) / ticks * 1000
+
+        results.append((count, scalar, vectorized))
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time ghost updates per tick")
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--counts", type=int, nargs="+", default=[4, 16, 64, 256, 1000])
+    parser.add_argument("--ticks", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'ghosts':>7s} {'Ghost.update':>13s} {'GhostManager':>13s}")
+    for count, scalar, vectorized in benchmark(args.level, args.counts, args.ticks, args.seed):
+        print(f"{count:7d} {scalar:10.3f} ms {vectorized:10.3f} ms")
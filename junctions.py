@@ -0,0 +1,164 @@
+# junctions.py - Junction graph of a maze for corridor-following ghosts
+import os
+import argparse
+import random
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from tilegrid import DIRECTIONS, TileGrid
+
+class JunctionGraph:
+    def __init__(self, layout):
+        # Nodes are tiles where a ghost has a choice to make (junctions) or
+        # has to turn back (dead ends); everything between two nodes is a
+        # corridor with exactly one way on
+        self.grid = TileGrid(layout)
+        self.rows = self.grid.rows
+        self.cols = self.grid.cols
+        self.walkable = self.grid.walkable
+        self.neighbors = self.grid.neighbors
+        walkable = self.walkable
+
+        degree = [sum(link >= 0 for link in links) for links in self.neighbors]
+        self.nodes = {index for index, open_ in enumerate(walkable) if open_ and degree[index] != 2}
+
+        # A loop with no junction on it still needs one node to start from
+        seen = set()
+        for index, open_ in enumerate(walkable):
+            if open_ and index not in seen:
+                component = self.grid.flood(index)
+                seen |= component
+                if not component & self.nodes:
+                    self.nodes.add(min(component))
+
+        # exits[node] lists (direction, path) for every corridor leaving it;
+        # path holds the tiles walked, ending on the next node
+        self.exits = {}
+        self.exits = {node: self.routes_from(node) for node in self.nodes}
+        self.edges = sum(len(exits) for exits in self.exits.values()) // 2
+
+    def walk(self, start, first):
+        # Follow a corridor from start through first until a node
+        path = [first]
+        previous, tile = start, first
+        while tile not in self.nodes:
+            following = [n for n in self.neighbors[tile] if n >= 0 and n != previous]
+            previous, tile = tile, following[0]
+            path.append(tile)
+        return path
+
+    def routes_from(self, tile):
+        # (direction, path) for every way out of a tile; works from the
+        # middle of a corridor too, as ghosts are after a respawn
+        exits = self.exits.get(tile)
+        if exits is not None:
+            return exits
+        return [
+            (DIRECTIONS[d], self.walk(tile, neighbor))
+            for d, neighbor in enumerate(self.neighbors[tile])
+            if neighbor >= 0
+        ]
+
+class JunctionNavigator:
+    def __init__(self, graph, offset_x, offset_y, tile_size):
+        self.graph = graph
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.tile_size = tile_size
+
+        # Corridors out of every node as ready-made screen steps, so the
+        # ghosts following them never touch the tile grid
+        self.exits = {
+            node: [(direction, self.steps(node, path)) for direction, path in exits]
+            for node, exits in graph.exits.items()
+        }
+
+    def tile_position(self, tile):
+        # Screen position of a tile's top-left corner
+        y, x = divmod(tile, self.graph.cols)
+        return self.offset_x + x * self.tile_size, self.offset_y + y * self.tile_size
+
+    def steps(self, start, path):
+        # (x, y, direction) of each tile along a path, last first, with the
+        # direction a ghost faces walking into it
+        steps = []
+        previous_y, previous_x = divmod(start, self.graph.cols)
+        for tile in path:
+            y, x = divmod(tile, self.graph.cols)
+            steps.append(self.tile_position(tile) + ((x - previous_x, y - previous_y),))
+            previous_x, previous_y = x, y
+        return steps[::-1]
+
+    def tile_at(self, x, y):
+        # Walkable tile under a screen point, or -1
+        return self.graph.grid.tile_at(x, y, self.offset_x, self.offset_y, self.tile_size)
+
+    def route(self, rect, direction, target=None, flee=False, rng=None):
+        # Pick the corridor to take from the tile the box stands on, the way
+        # arcade ghosts do: never straight back unless it is a dead end, then
+        # whichever first tile is nearest to (or, fleeing, farthest from)
+        # the target, or a random one without a target
+        here = self.tile_at(*rect.topleft)
+        if here < 0:
+            return []
+        options = self.exits.get(here)
+        if options is None:
+            options = [(step, self.steps(here, path)) for step, path in self.graph.routes_from(here)]
+        if len(options) > 1:
+            back = (-direction[0], -direction[1])
+            options = [option for option in options if option[0] != back]
+        if not options:
+            return []
+
+        if target is None:
+            _, steps = rng.choice(options) if rng else options[0]
+        else:
+            half = self.tile_size // 2
+            def distance(option):
+                x, y, _ = option[1][-1]
+                dx = x + half - target[0]
+                dy = y + half - target[1]
+                return dx * dx + dy * dy
+            _, steps = (max if flee else min)(options, key=distance)
+        return list(steps)
+
+def benchmark(level_num=1, counts=(4, 64, 1000), ticks=300, seed=0):
+    # Milliseconds per tick for free-moving ghosts and corridor-following ones
+    from game import Game
+    from ghosts import spawn_ghosts
+
+    results = []
+    for count in counts:
+        game = Game(None, level_num, seed=seed)
+        navigator = JunctionNavigator(JunctionGraph(game.map_data), game.map_offset_x, game.map_offset_y, game.tile_size)
+        timings = []
+        for junctions in (None, navigator):
+            ghosts = spawn_ghosts(game, count, random.Random(seed))
+            for ghost in ghosts:
+                ghost.junctions = junctions
+            start = time.perf_counter()
+            for tick in range(ticks):
+                for ghost in ghosts:
+                    ghost.update(game.wall_grid, game.pacman)
+            timings.append((time.perf_counter() - start) / ticks * 1000)
+        results.append((count, timings[0], timings[1]))
+    return results
+
+if __name__ == "__main__":
+    from level import LEVEL_LAYOUTS
+
+    parser = argparse.ArgumentParser(description="Junction graphs of every level and ghost update cost")
+    parser.add_argument("--level", type=int, default=1, help="level to time ghosts on")
+    parser.add_argument("--counts", type=int, nargs="+", default=[4, 64, 1000])
+    parser.add_argument("--ticks", type=int, default=300)
+    args = parser.parse_args()
+
+    for level_num, layout in enumerate(LEVEL_LAYOUTS, 1):
+        graph = JunctionGraph(layout)
+        walkable = sum(graph.walkable)
+        print(f"level {level_num:2d}: {walkable} walkable tiles, {len(graph.nodes)} nodes, {graph.edges} corridors")
+
+    print(f"{'ghosts':>7s} {'free moving':>12s} {'junctions':>12s}")
+    for count, free, graph in benchmark(args.level, args.counts, args.ticks):
+        print(f"{count:7d} {free:9.3f} ms {graph:9.3f} ms")
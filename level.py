@@ -1,5 +1,11 @@
 # level.py - Level loading and management
+import os
+import sys
+import argparse
+import hashlib
+import json
 import pygame
+from reachability import Reachability
 
 # Define 10 different maze layouts
 LEVEL_LAYOUTS = [
@@ -326,28 +332,231 @@ LEVEL_LAYOUTS = [
     ]
 ]
 
+# Wall boxes sit inside their tile: 2.5px in from the top-left (truncated
+# to 2 by pygame.Rect), 15px square, leaving a 5px gap to the next wall
+WALL_INSET = 2.5
+WALL_SIZE = 15
+
+def merge_wall_cells(map_data):
+    # Greedy meshing: cover the 'W' cells with as few rectangles as
+    # possible, each grown as far right as it goes and then down while
+    # the whole run below is wall too. Returns (x, y, width, height) in
+    # tiles
+    walls = [[cell == 'W' for cell in row] for row in map_data]
+    used = [[False] * len(row) for row in map_data]
+    
+    def free(x, y):
+        return y < len(walls) and x < len(walls[y]) and walls[y][x] and not used[y][x]
+    
+    cells = []
+    for y, row in enumerate(walls):
+        for x in range(len(row)):
+            if not free(x, y):
+                continue
+            width = 1
+            while free(x + width, y):
+                width += 1
+            height = 1
+            while all(free(x + i, y + height) for i in range(width)):
+                height += 1
+            for j in range(height):
+                for i in range(width):
+                    used[y + j][x + i] = True
+            cells.append((x, y, width, height))
+    return cells
+
+def wall_cells(map_data):
+    # Every 'W' cell as a one-tile (x, y, width, height) block
+    return [
+        (x, y, 1, 1)
+        for y, row in enumerate(map_data)
+        for x, cell in enumerate(row)
+        if cell == 'W'
+    ]
+
+def cell_rects(cells, offset_x=0, offset_y=0, tile_size=20):
+    # Screen rects for (x, y, width, height) tile blocks
+    return [
+        pygame.Rect(
+            offset_x + x * tile_size + WALL_INSET,
+            offset_y + y * tile_size + WALL_INSET,
+            (width - 1) * tile_size + WALL_SIZE,
+            (height - 1) * tile_size + WALL_SIZE
+        )
+        for x, y, width, height in cells
+    ]
+
+def build_wall_rects(map_data, offset_x=0, offset_y=0, tile_size=20, merge=True):
+    # One rect per wall cell, or with merge the cells joined into larger
+    # rects that also cover the gaps between them. Nothing wider and
+    # taller than the 5px gap fits in one, so for Pac-Man and the ghosts
+    # both collide alike; the per-cell rects are kept for drawing the gaps
+    cells = merge_wall_cells(map_data) if merge else wall_cells(map_data)
+    return cell_rects(cells, offset_x, offset_y, tile_size)
+
+class Level:
+    def __init__(self, map_data):
+        # What a game needs from a layout, found in one pass over it; a
+        # compiled level pack (levelpack.py) provides the same fields
+        self.rows = map_data
+        self.pacman = None  # Tile of the last 'P'
+        self.ghosts = []
+        self.pellets = []
+        self.power_pellets = []
+        for y, row in enumerate(map_data):
+            for x, cell in enumerate(row):
+                if cell == 'P':
+                    self.pacman = (x, y)
+                elif cell == 'G':
+                    self.ghosts.append((x, y))
+                elif cell == '.':
+                    self.pellets.append((x, y))
+                elif cell == 'O':
+                    self.power_pellets.append((x, y))
+        self.wall_cells = wall_cells(map_data)
+        self.wall_blocks = merge_wall_cells(map_data)
+        self.distances = None  # Only packs can carry distance tables
+        
+        # Pellets Pac-Man can never get to; the level is complete once only
+        # these are left
+        self.unreachable_pellets = len(Reachability(map_data).unreachable_pellets)
+
+class LevelError(ValueError):
+    pass
+
+# Symbols a layout may use: wall, pellet, power pellet, Pac-Man, ghost and
+# empty floor
+LEVEL_SYMBOLS = "W.OPG "
+
+# Extensions of the level files a LevelDirectory picks up
+LEVEL_FILE_TYPES = ('.txt', '.json')
+
+def layout_problems(map_data):
+    # Everything wrong with a layout, as messages; an empty list means it
+    # is fine to play
+    if not map_data:
+        return ["the layout has no rows"]
+    problems = []
+    width = len(map_data[0])
+    for y, row in enumerate(map_data):
+        if len(row) != width:
+            problems.append(f"row {y + 1} is {len(row)} tiles wide, row 1 is {width}")
+        for x, cell in enumerate(row):
+            if cell not in LEVEL_SYMBOLS:
+                hint = f" (did you mean '{cell.upper()}'?)" if cell.upper() in LEVEL_SYMBOLS else ""
+                problems.append(f"stray symbol '{cell}' at row {y + 1}, column {x + 1}{hint}")
+    starts = sum(row.count('P') for row in map_data)
+    if starts == 0:
+        problems.append("no 'P' for Pac-Man to start on")
+    elif starts > 1:
+        problems.append(f"{starts} 'P' tiles, Pac-Man needs exactly one")
+    return problems
+
+def validate_layout(map_data, source="layout"):
+    problems = layout_problems(map_data)
+    if problems:
+        raise LevelError(f"{source}: " + "; ".join(problems))
+
+def parse_level_file(path, data):
+    # A .txt file holds the rows one per line; a .json file holds either
+    # the list of rows or an object with a "rows" list
+    try:
+        text = data.decode('utf-8')
+    except UnicodeDecodeError as e:
+        raise LevelError(f"{path}: not UTF-8 text ({e})")
+    
+    if path.endswith('.json'):
+        try:
+            content = json.loads(text)
+        except ValueError as e:
+            raise LevelError(f"{path}: invalid JSON ({e})")
+        rows = content.get('rows') if isinstance(content, dict) else content
+        if not isinstance(rows, list) or not all(isinstance(row, str) for row in rows):
+            raise LevelError(f'{path}: expected a list of strings or {{"rows": [...]}}')
+        return rows
+    
+    # Trailing blank lines are left by most editors and aren't part of the maze
+    rows = text.splitlines()
+    while rows and not rows[-1].strip():
+        rows.pop()
+    return rows
+
+# Level files already read: path -> ((mtime, size), content hash), and
+# content hash -> validated Level, so an unchanged file costs one stat call
+# and a copy of the same maze is only validated once
+_level_files = {}
+_levels_by_hash = {}
+
+def load_level_file(path):
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _level_files.get(path)
+    if cached and cached[0] == key:
+        return _levels_by_hash[cached[1]]
+    
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha1(data).hexdigest()
+    level = _levels_by_hash.get(digest)
+    if level is None:
+        rows = parse_level_file(path, data)
+        validate_layout(rows, path)
+        level = Level(rows)
+        _levels_by_hash[digest] = level
+    _level_files[path] = (key, digest)
+    return level
+
+class LevelDirectory:
+    def __init__(self, path):
+        # The built-in levels come first, then the directory's level files in
+        # name order; every file is validated here so a broken one is found
+        # at start-up rather than mid-game
+        self.path = path
+        self.files = sorted(
+            os.path.join(path, name)
+            for name in os.listdir(path)
+            if name.endswith(LEVEL_FILE_TYPES)
+        )
+        for file_path in self.files:
+            load_level_file(file_path)
+    
+    def __len__(self):
+        return len(LEVEL_LAYOUTS) + len(self.files)
+    
+    def level(self, level_num):
+        if 1 <= level_num <= len(LEVEL_LAYOUTS):
+            return Level(LEVEL_LAYOUTS[level_num - 1])
+        if len(LEVEL_LAYOUTS) < level_num <= len(self):
+            return load_level_file(self.files[level_num - len(LEVEL_LAYOUTS) - 1])
+        raise LevelError(f"no level {level_num}, {self.path} has levels 1 to {len(self)}")
+
 def load_level(level_num):
     if 1 <= level_num <= len(LEVEL_LAYOUTS):
         map_data = LEVEL_LAYOUTS[level_num - 1]
-        wall_rects = []
         
-        # Create wall rectangles based on the map data
-        for y, row in enumerate(map_data):
-            for x, cell in enumerate(row):
-                if cell == 'W':
-                    # Create wall rectangle with proper grid alignment and width 15
-                    wall_rect = pygame.Rect(
-                        x * 20,  # x position
-                        y * 20,  # y position
-                        15,      # width of 15
-                        15       # height of 15
-                    )
-                    # Center the wall rectangle
-                    wall_rect.x += 2.5  # Shift right by 2.5 pixels
-                    wall_rect.y += 2.5  # Shift down by 2.5 pixels
-                    wall_rects.append(wall_rect)
+        # Create wall rectangles based on the map data, merged into runs
+        wall_rects = build_wall_rects(map_data)
         
         return map_data, wall_rects
     else:
-        # Return a default level if the level number is invalid
-        return LEVEL_LAYOUTS[0], []
\ No newline at end of file
+        raise LevelError(f"no level {level_num}, there are levels 1 to {len(LEVEL_LAYOUTS)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Wall rect counts and layout problems of every level")
+    parser.add_argument("--levels", metavar="DIR", help="also check the level files in DIR")
+    args = parser.parse_args()
+    
+    for level_num, layout in enumerate(LEVEL_LAYOUTS, 1):
+        cells = len(build_wall_rects(layout, merge=False))
+        merged = len(build_wall_rects(layout))
+        print(f"level {level_num:2d}: {cells} wall rects, {merged} merged ({cells / merged:.1f}x fewer)")
+        for problem in layout_problems(layout):
+            print(f"    {problem}")
+    
+    if args.levels:
+        try:
+            levels = LevelDirectory(args.levels)
+        except LevelError as e:
+            sys.exit(str(e))
+        for level_num, path in enumerate(levels.files, len(LEVEL_LAYOUTS) + 1):
+            print(f"level {level_num:2d}: {path} is fine")
@@ -0,0 +1,247 @@
+# levelpack.py - Compiled binary level pack, read through mmap
+import os
+import sys
+import argparse
+import mmap
+import struct
+import time
+from functools import cached_property
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from level import Level, LevelDirectory, LevelError, LEVEL_LAYOUTS, load_level_file
+
+# File layout, all little-endian:
+#   header   magic, version, level count
+#   index    (offset, size) of every level record
+#   record   LEVEL_HEADER, then the sections below, each padded to an even
+#            length so the 16-bit arrays stay aligned:
+#            row lengths, raw rows, wall bitmask (one bit per tile, rows
+#            padded to whole bytes), ghost, pellet and power pellet tiles as
+#            (x, y), merged wall blocks as (x, y, width, height), and with
+#            HAS_DISTANCES the tile-to-tile distance table (see pathfinding.py)
+MAGIC = b"PMLP"
+VERSION = 2
+HEADER = struct.Struct("<4sHH")
+INDEX_ENTRY = struct.Struct("<II")
+# cols, rows, flags, Pac-Man's tile, then the counts of ghosts, pellets,
+# power pellets, wall blocks, distance table tiles and unreachable pellets
+LEVEL_HEADER = struct.Struct("<5H6I")
+
+HAS_DISTANCES = 1
+NO_TILE = 0xFFFF  # Pac-Man position in a level without a 'P'
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels.pack")
+
+def pad(data):
+    return data + b"\0" * (len(data) % 2)
+
+def pack_points(points):
+    # (x, y) or (x, y, width, height) tuples as one run of uint16
+    values = [value for point in points for value in point]
+    return struct.pack(f"<{len(values)}H", *values)
+
+def compile_level(layout, distances=False):
+    level = Level(layout)
+    rows = len(layout)
+    cols = max(len(row) for row in layout)
+
+    bitmask = bytearray(rows * ((cols + 7) // 8))
+    for x, y, _, _ in level.wall_cells:
+        bit = y * ((cols + 7) // 8) * 8 + x
+        bitmask[bit // 8] |= 1 << (bit % 8)
+
+    table = None
+    if distances:
+        from pathfinding import load_distance_table  # Needs NumPy
+        table = load_distance_table(layout)
+
+    pacman_x, pacman_y = level.pacman or (NO_TILE, NO_TILE)
+    header = LEVEL_HEADER.pack(
+        cols, rows, HAS_DISTANCES if table else 0, pacman_x, pacman_y,
+        len(level.ghosts), len(level.pellets), len(level.power_pellets), len(level.wall_blocks),
+        len(table.tiles) if table else 0, level.unreachable_pellets
+    )
+    sections = [
+        header,
+        pack_points([(len(row),) for row in layout]),
+        pad("".join(layout).encode("ascii")),
+        pad(bytes(bitmask)),
+        pack_points(level.ghosts),
+        pack_points(level.pellets),
+        pack_points(level.power_pellets),
+        pack_points(level.wall_blocks)
+    ]
+    if table:
+        sections.append(table.distances.astype("<u2").tobytes())
+    return b"".join(sections)
+
+def compile_pack(layouts, path=DEFAULT_PATH, distances=False):
+    # Written next to the target and moved into place, so a game never
+    # maps a half-written pack
+    records = [compile_level(layout, distances) for layout in layouts]
+    offset = HEADER.size + INDEX_ENTRY.size * len(records)
+    index = []
+    for record in records:
+        index.append(INDEX_ENTRY.pack(offset, len(record)))
+        offset += len(record)
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(records)))
+        f.write(b"".join(index))
+        for record in records:
+            f.write(record)
+    os.replace(temp_path, path)
+    return offset
+
+class PackedLevel:
+    def __init__(self, buffer, offset):
+        # Only the fixed header is read up front; each section is decoded
+        # the first time it is asked for
+        self.buffer = buffer
+        (self.cols, self.row_count, self.flags, pacman_x, pacman_y, ghosts, pellets, power_pellets,
+         blocks, self.tile_count, self.unreachable_pellets) = LEVEL_HEADER.unpack_from(buffer, offset)
+        self.pacman = (pacman_x, pacman_y) if pacman_x != NO_TILE else None
+
+        # Where every section starts
+        self.row_lengths_at = offset + LEVEL_HEADER.size
+        self.rows_at = self.row_lengths_at + 2 * self.row_count
+        self.counts = (ghosts, pellets, power_pellets, blocks)
+
+    def points(self, at, count, size=2):
+        values = struct.unpack_from(f"<{count * size}H", self.buffer, at)
+        return list(zip(*(values[i::size] for i in range(size))))
+
+    @cached_property
+    def row_lengths(self):
+        return struct.unpack_from(f"<{self.row_count}H", self.buffer, self.row_lengths_at)
+
+    @cached_property
+    def sections(self):
+        # Offsets of the bitmask, ghosts, pellets, power pellets, wall
+        # blocks and distances
+        raw = sum(self.row_lengths)
+        bitmask_at = self.rows_at + raw + raw % 2
+        bitmask = self.row_count * ((self.cols + 7) // 8)
+        ghosts_at = bitmask_at + bitmask + bitmask % 2
+        pellets_at = ghosts_at + 4 * self.counts[0]
+        power_at = pellets_at + 4 * self.counts[1]
+        blocks_at = power_at + 4 * self.counts[2]
+        distances_at = blocks_at + 8 * self.counts[3]
+        return bitmask_at, ghosts_at, pellets_at, power_at, blocks_at, distances_at
+
+    @cached_property
+    def rows(self):
+        raw = bytes(self.buffer[self.rows_at:self.rows_at + sum(self.row_lengths)]).decode("ascii")
+        rows = []
+        start = 0
+        for length in self.row_lengths:
+            rows.append(raw[start:start + length])
+            start += length
+        return rows
+
+    def is_wall(self, x, y):
+        if not (0 <= x < self.cols and 0 <= y < self.row_count):
+            return False
+        bit = y * ((self.cols + 7) // 8) * 8 + x
+        return bool(self.buffer[self.sections[0] + bit // 8] & (1 << (bit % 8)))
+
+    @cached_property
+    def wall_cells(self):
+        # Each bitmask row as one integer, walked from its lowest set bit
+        width = (self.cols + 7) // 8
+        start = self.sections[0]
+        cells = []
+        for y in range(self.row_count):
+            bits = int.from_bytes(self.buffer[start + y * width:start + (y + 1) * width], "little")
+            while bits:
+                lowest = bits & -bits
+                cells.append((lowest.bit_length() - 1, y, 1, 1))
+                bits ^= lowest
+        return cells
+
+    @cached_property
+    def ghosts(self):
+        return self.points(self.sections[1], self.counts[0])
+
+    @cached_property
+    def pellets(self):
+        return self.points(self.sections[2], self.counts[1])
+
+    @cached_property
+    def power_pellets(self):
+        return self.points(self.sections[3], self.counts[2])
+
+    @cached_property
+    def wall_blocks(self):
+        return self.points(self.sections[4], self.counts[3], 4)
+
+    @cached_property
+    def distances(self):
+        # A read-only view straight onto the mapped file
+        if not self.flags & HAS_DISTANCES:
+            return None
+        import numpy as np
+        count = self.tile_count
+        return np.frombuffer(self.buffer, dtype="<u2", count=count * count,
+                             offset=self.sections[5]).reshape(count, count)
+
+class LevelPack:
+    def __init__(self, path=DEFAULT_PATH):
+        # The file is mapped, not read: a level's pages are only loaded
+        # when a game opens it
+        with open(path, "rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(self.mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} level pack")
+        self.index = [INDEX_ENTRY.unpack_from(self.mmap, HEADER.size + INDEX_ENTRY.size * i) for i in range(count)]
+        self.levels = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def level(self, level_num):
+        if not 1 <= level_num <= len(self.index):
+            raise LevelError(f"no level {level_num}, the pack has levels 1 to {len(self.index)}")
+        level = self.levels.get(level_num)
+        if level is None:
+            level = PackedLevel(self.mmap, self.index[level_num - 1][0])
+            self.levels[level_num] = level
+        return level
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the levels into a binary level pack")
+    parser.add_argument("--output", default=DEFAULT_PATH)
+    parser.add_argument("--distances", action="store_true", help="include distance tables (needs numpy)")
+    parser.add_argument("--levels", metavar="DIR", help="add the level files in DIR after the built-in levels")
+    args = parser.parse_args()
+
+    layouts = list(LEVEL_LAYOUTS)
+    if args.levels:
+        try:
+            layouts += [load_level_file(path).rows for path in LevelDirectory(args.levels).files]
+        except LevelError as e:
+            sys.exit(str(e))
+
+    start = time.perf_counter()
+    size = compile_pack(layouts, args.output, args.distances)
+    print(f"{args.output}: {len(layouts)} levels, {size / 1024:,.1f} KiB, "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # Open every level both ways, with all the fields a game reads
+    fields = ("rows", "pacman", "ghosts", "pellets", "power_pellets", "wall_cells", "wall_blocks", "unreachable_pellets")
+    pack = LevelPack(args.output)
+    for level_num, layout in enumerate(layouts, 1):
+        start = time.perf_counter()
+        parsed = Level(layout)
+        parse_time = time.perf_counter() - start
+        start = time.perf_counter()
+        packed = pack.level(level_num)
+        for field in fields:
+            getattr(packed, field)
+        pack_time = time.perf_counter() - start
+        same = all(getattr(parsed, field) == getattr(packed, field) for field in fields)
+        print(f"level {level_num:2d}: parsed {parse_time * 1000:.2f} ms, packed {pack_time * 1000:.2f} ms"
+              f"{'' if same else ', MISMATCH'}")
@@ -2,8 +2,15 @@
 import pygame
 import sys
 import os
+import argparse
+import time
 from menu import Menu
 from game import Game
+from replay import InputRecorder, save_replay
+from rewind import RewindBuffer
+from levelpack import LevelPack
+from level import LevelDirectory, LEVEL_LAYOUTS
+from render import DirtyRectRenderer, get_font, render_text
 
 # Initialize Pygame
 pygame.init()
@@ -14,6 +21,11 @@ SCREEN_WIDTH = 1400
 SCREEN_HEIGHT = 800
 TITLE = "Pac-Man Adventure"
 
+# Simulation runs at a fixed tick rate; rendering runs at up to MAX_FPS
+TICK_RATE = 60
+MAX_TICKS_PER_FRAME = 5  # Catch-up limit so a long hitch can't snowball
+MAX_FPS = 60  # A common display refresh rate; 0 leaves the frame rate uncapped (and busy-waits)
+
 # Create the game window
 screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 pygame.display.set_caption(TITLE)
@@ -26,18 +38,40 @@ GAME_OVER = 2
 LEVEL_COMPLETE = 3
 
 class PacManGame:
-    def __init__(self):
+    def __init__(self, dirty_rects=False, max_fps=MAX_FPS, record_dir=None, practice=False,
+                 rewind_seconds=10, rewind_memory=4 * 1024 * 1024, game_options=None):
         self.screen = screen
+        self.max_fps = max_fps
         self.clock = clock
         self.state = MENU
         self.level = 1
         self.score = 0
         self.lives = 3
         
+        # Extra keyword arguments for every Game, such as horde mode; with
+        # game_options['levels'] the levels come from a pack or directory
+        self.game_options = game_options or {}
+        levels = self.game_options.get('levels')
+        self.level_count = len(levels) if levels else len(LEVEL_LAYOUTS)
+        
         # Create game components
-        self.menu = Menu(self.screen, self.start_game)
+        self.menu = Menu(self.screen, self.start_game, self.level_count)
         self.game = None
         
+        # Optional dirty-rect renderer for the PLAYING state
+        self.renderer = DirtyRectRenderer(self.screen) if dirty_rects else None
+        
+        # Optional input recording of every level played
+        self.record_dir = record_dir
+        self.recorder = None
+        
+        # Practice mode keeps recent play so holding Backspace rewinds it;
+        # rewound runs can't be replayed, so they aren't recorded
+        self.practice = practice
+        self.rewind_seconds = rewind_seconds
+        self.rewind_memory = rewind_memory
+        self.rewinder = None
+        
         # Load sounds
         self.load_sounds()
         
@@ -52,27 +86,52 @@ class PacManGame:
         
     def start_game(self, level=1):
         self.level = level
-        self.game = Game(self.screen, level, self.end_level, self.game_over)
+        self.game = Game(self.screen, level, self.end_level, self.game_over, **self.game_options)
+        if self.renderer:
+            self.game.renderer = self.renderer
+            self.renderer.mark_all()
+        if self.practice:
+            self.rewinder = RewindBuffer(self.game, self.rewind_seconds, max_bytes=self.rewind_memory, tick_rate=TICK_RATE)
+        elif self.record_dir:
+            self.recorder = InputRecorder(self.game)
         self.state = PLAYING
         # self.start_sound.play()
         
+    def save_recording(self):
+        if not self.recorder:
+            return
+        os.makedirs(self.record_dir, exist_ok=True)
+        replay = self.recorder.finish()
+        path = os.path.join(self.record_dir, f"level{replay.level_num:02d}-{time.strftime('%Y%m%d-%H%M%S')}.pmr")
+        save_replay(replay, path)
+        self.recorder = None
+        
     def end_level(self, score):
+        self.save_recording()
         self.score += score
         self.level += 1
-        if self.level > 10:
+        if self.level > self.level_count:
             self.level = 1
             self.state = MENU
         else:
             self.state = LEVEL_COMPLETE
     
     def game_over(self, score):
+        self.save_recording()
         self.score += score
         self.state = GAME_OVER
     
     def run(self):
         running = True
         
+        # Real time not yet simulated, in seconds
+        tick_time = 1.0 / TICK_RATE
+        accumulator = 0.0
+        self.clock.tick()
+        
         while running:
+            accumulator += self.clock.tick(self.max_fps) / 1000.0
+            
             # Handle events
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -89,45 +148,83 @@ class PacManGame:
                     if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
                         self.start_game(self.level)
             
-            # Update game state
-            if self.state == MENU:
-                self.menu.update()
-            elif self.state == PLAYING:
-                self.game.update()
-            
-            # Draw everything
-            self.screen.fill((0, 0, 0))
+            # Update game state in fixed ticks, however long the frame took
+            ticks = 0
+            while accumulator >= tick_time and ticks < MAX_TICKS_PER_FRAME:
+                if self.state == MENU:
+                    self.menu.update()
+                elif self.state == PLAYING:
+                    if self.rewinder and pygame.key.get_pressed()[pygame.K_BACKSPACE]:
+                        # One tick back per tick held, so rewinding runs at play speed
+                        self.rewinder.rewind(1)
+                    else:
+                        if self.rewinder:
+                            self.rewinder.record_tick()
+                        self.game.update()
+                accumulator -= tick_time
+                ticks += 1
+            if ticks == MAX_TICKS_PER_FRAME:
+                # Drop the backlog rather than falling further behind
+                accumulator = min(accumulator, tick_time)
             
-            if self.state == MENU:
-                self.menu.draw()
-            elif self.state == PLAYING:
-                self.game.draw()
-            elif self.state == GAME_OVER:
-                self.draw_game_over()
-            elif self.state == LEVEL_COMPLETE:
-                self.draw_level_complete()
+            # How far we are into the next tick, for smooth movement
+            alpha = accumulator / tick_time
             
-            pygame.display.flip()
-            self.clock.tick(60)
+            # Draw everything
+            if self.renderer and self.state == PLAYING:
+                # Only push the areas that changed this frame
+                self.renderer.begin_frame()
+                self.game.draw(alpha)
+                self.renderer.present()
+            else:
+                self.screen.fill((0, 0, 0))
+                
+                if self.state == MENU:
+                    self.menu.draw()
+                elif self.state == PLAYING:
+                    self.game.draw(alpha)
+                elif self.state == GAME_OVER:
+                    self.draw_game_over()
+                elif self.state == LEVEL_COMPLETE:
+                    self.draw_level_complete()
+                
+                pygame.display.flip()
+                if self.renderer:
+                    self.renderer.mark_all()
+        
+        # Keep the recording of a level left unfinished
+        self.save_recording()
+        
+        if self.renderer and self.renderer.frames:
+            print(f"Dirty-rect renderer: {self.renderer.average_fraction:.1%} of pixels updated per frame "
+                  f"over {self.renderer.frames} frames")
+        
+        if self.game and self.game.horde and self.game.tick:
+            ghosts = self.game.horde
+            # Every ghost against Pac-Man, plus every ghost pair when they
+            # keep apart from each other
+            naive = ghosts + ghosts * (ghosts - 1) // 2 if self.game.ghost_separation else ghosts
+            print(f"Horde mode: {ghosts} ghosts, {self.game.total_collision_tests / self.game.tick:,.0f} "
+                  f"collision pair tests per tick (testing every pair would take {naive:,})")
         
         pygame.quit()
         sys.exit()
     
     def draw_game_over(self):
-        font = pygame.font.SysFont('Arial', 48)
-        game_over_text = font.render('GAME OVER', True, (255, 0, 0))
-        score_text = font.render(f'Score: {self.score}', True, (255, 255, 255))
-        continue_text = font.render('Press Enter to continue', True, (255, 255, 255))
+        font = get_font('Arial', 48)
+        game_over_text = render_text(font, 'GAME OVER', (255, 0, 0))
+        score_text = render_text(font, f'Score: {self.score}', (255, 255, 255))
+        continue_text = render_text(font, 'Press Enter to continue', (255, 255, 255))
         
         self.screen.blit(game_over_text, (SCREEN_WIDTH//2 - game_over_text.get_width()//2, SCREEN_HEIGHT//2 - 100))
         self.screen.blit(score_text, (SCREEN_WIDTH//2 - score_text.get_width()//2, SCREEN_HEIGHT//2))
         self.screen.blit(continue_text, (SCREEN_WIDTH//2 - continue_text.get_width()//2, SCREEN_HEIGHT//2 + 100))
     
     def draw_level_complete(self):
-        font = pygame.font.SysFont('Arial', 48)
-        level_text = font.render(f'Level {self.level-1} Complete!', True, (255, 255, 0))
-        score_text = font.render(f'Score: {self.score}', True, (255, 255, 255))
-        continue_text = font.render('Press Enter to continue to next level', True, (255, 255, 255))
+        font = get_font('Arial', 48)
+        level_text = render_text(font, f'Level {self.level-1} Complete!', (255, 255, 0))
+        score_text = render_text(font, f'Score: {self.score}', (255, 255, 255))
+        continue_text = render_text(font, 'Press Enter to continue to next level', (255, 255, 255))
         
         self.screen.blit(level_text, (SCREEN_WIDTH//2 - level_text.get_width()//2, SCREEN_HEIGHT//2 - 100))
         self.screen.blit(score_text, (SCREEN_WIDTH//2 - score_text.get_width()//2, SCREEN_HEIGHT//2))
@@ -135,5 +232,49 @@ class PacManGame:
 
 # Run the game
 if __name__ == "__main__":
-    game = PacManGame()
+    parser = argparse.ArgumentParser(description=TITLE)
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="only push changed screen areas to the display while playing")
+    parser.add_argument("--max-fps", type=int, default=MAX_FPS,
+                        help="cap the render frame rate (default %d, 0 for uncapped); the game always runs at %d ticks per second" % (MAX_FPS, TICK_RATE))
+    parser.add_argument("--record", metavar="DIR",
+                        help="save a replay of every level played to DIR")
+    parser.add_argument("--practice", action="store_true",
+                        help="hold Backspace to rewind recent play (levels are not recorded)")
+    parser.add_argument("--rewind-seconds", type=int, default=10,
+                        help="how much play practice mode keeps for rewinding")
+    parser.add_argument("--rewind-memory", type=int, default=4, metavar="MB",
+                        help="memory limit for the rewind buffer")
+    parser.add_argument("--horde", type=int, default=0, metavar="N",
+                        help="load test: N ghosts on random open tiles instead of the level's own")
+    parser.add_argument("--ghost-separation", action="store_true",
+                        help="in horde mode, stop ghosts walking into each other")
+    parser.add_argument("--vectorized-ghosts", action="store_true",
+                        help="update the ghosts with NumPy (needs numpy)")
+    parser.add_argument("--navigation", choices=["distances", "flow", "junctions"],
+                        help="let ghosts find their way through the maze: precomputed distance tables "
+                             "(needs numpy), a flow field toward Pac-Man, or turns only at junctions")
+    sources = parser.add_mutually_exclusive_group()
+    sources.add_argument("--level-pack", metavar="PATH",
+                         help="open levels from a pack compiled by levelpack.py instead of parsing them")
+    sources.add_argument("--levels", metavar="DIR",
+                         help="add the .txt and .json level files in DIR after the built-in levels")
+    args = parser.parse_args()
+    
+    try:
+        if args.level_pack:
+            levels = LevelPack(args.level_pack)
+        elif args.levels:
+            levels = LevelDirectory(args.levels)
+        else:
+            levels = None
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    
+    game = PacManGame(dirty_rects=args.dirty_rects, max_fps=args.max_fps, record_dir=args.record,
+                      practice=args.practice, rewind_seconds=args.rewind_seconds,
+                      rewind_memory=args.rewind_memory * 1024 * 1024,
+                      game_options={'horde': args.horde, 'ghost_separation': args.ghost_separation,
+                                    'vectorized_ghosts': args.vectorized_ghosts, 'navigation': args.navigation,
+                                    'levels': levels})
     game.run()
\ No newline at end of file
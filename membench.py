@@ -0,0 +1,127 @@
+# membench.py - Memory used per entity, for sizing large custom mazes
+import os
+import argparse
+import random
+import tracemalloc
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+from entities import PacMan, Ghost, PelletGrid
+
+TILE_SIZE = 20
+
+def measure(build, count):
+    # Bytes allocated per entity while building count of them; the result
+    # is kept alive until the snapshot is taken
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entities = build(count)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del entities
+    return (after - before) / count
+
+# The entities as they were before slots and the pellet grid: plain
+# classes with an instance __dict__, and one object with its own Rect per
+# pellet. They hold the same fields as today's classes (methods take no
+# memory per instance), so only the storage layout differs
+class LegacyPacMan:
+    def __init__(self, x, y, size):
+        self.start_x = x
+        self.start_y = y
+        self.size = size
+        self.rect = pygame.Rect(x, y, size, size)
+        self.previous_pos = self.rect.topleft
+        self.mouth_angle = 0
+        self.mouth_opening = True
+        self.animation_speed = 10
+        self.speed = 3
+        self.grid_size = size
+        self.moving = False
+        self.direction = (0, 0)
+        self.next_direction = (0, 0)
+        self.position = [float(x), float(y)]
+        self.last_position = [float(x), float(y)]
+        self.grid_x = int(x / size)
+        self.grid_y = int(y / size)
+        self.last_direction = (0, 0)
+
+class LegacyGhost:
+    def __init__(self, x, y, size, color, rng):
+        self.start_x = x
+        self.start_y = y
+        self.size = size
+        self.color = color
+        self.scared_color = (0, 0, 255)
+        self.rng = rng
+        self.rect = pygame.Rect(x, y, size, size)
+        self.direction = (0, 0)
+        self.speed = 0.8
+        self.previous_pos = self.rect.topleft
+        self.behavior_type = rng.choice(["chase", "random", "patrol"])
+        self.patrol_points = [(rng.randint(100, 700), rng.randint(100, 500)) for _ in range(4)]
+        self.current_patrol_point = 0
+        self.navigator = None
+        self.junctions = None
+        self.route = []
+
+class LegacyPellet:
+    def __init__(self, x, y, tile_size):
+        self.size = tile_size // 5
+        self.rect = pygame.Rect(x + tile_size//2 - self.size//2, y + tile_size//2 - self.size//2, self.size, self.size)
+
+class LegacyPowerPellet:
+    def __init__(self, x, y, tile_size):
+        self.size = tile_size // 2
+        self.rect = pygame.Rect(x + tile_size//2 - self.size//2, y + tile_size//2 - self.size//2, self.size, self.size)
+        self.animation_counter = 0
+        self.visible = True
+
+def build_legacy(cls, *args):
+    # count entities laid out on a 1000-wide grid, as the builders below
+    def build(count):
+        return [cls(i % 1000, i // 1000, TILE_SIZE, *args) for i in range(count)]
+    return build
+
+def build_pacmen(count):
+    return [PacMan(i % 1000, i // 1000, TILE_SIZE) for i in range(count)]
+
+def build_ghosts(count):
+    rng = random.Random(0)
+    return [Ghost(i % 1000, i // 1000, TILE_SIZE, (255, 0, 0), rng) for i in range(count)]
+
+def build_pellet_grid(kind):
+    # A square maze with a pellet of the given kind on every tile
+    def build(count):
+        side = int(count ** 0.5)
+        grid = PelletGrid(side, count // side, 0, 0, TILE_SIZE)
+        for y in range(count // side):
+            for x in range(side):
+                grid.add(x, y, kind)
+        return grid
+    return build
+
+def run_benchmark(count):
+    # (name, bytes before, bytes after) per kind of entity; count is
+    # rounded down to a whole number of maze rows for the grids
+    side = int(count ** 0.5)
+    grid_count = side * (count // side)
+    rng = random.Random(0)
+    return [
+        ("PacMan", measure(build_legacy(LegacyPacMan), count), measure(build_pacmen, count)),
+        ("Ghost", measure(build_legacy(LegacyGhost, (255, 0, 0), rng), count), measure(build_ghosts, count)),
+        ("Pellet", measure(build_legacy(LegacyPellet), grid_count),
+         measure(build_pellet_grid(PelletGrid.PELLET), grid_count)),
+        ("PowerPellet", measure(build_legacy(LegacyPowerPellet), grid_count),
+         measure(build_pellet_grid(PelletGrid.POWER), grid_count))
+    ]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure bytes per entity, before and after slots and the pellet grid")
+    parser.add_argument("--count", type=int, default=50000, help="entities of each kind to build")
+    args = parser.parse_args()
+
+    print(f"{'bytes per entity':24s} {'before':>8s} {'after':>8s}")
+    for name, before, after in run_benchmark(args.count):
+        print(f"{name:24s} {before:8.1f} {after:8.1f}")
@@ -2,10 +2,12 @@
 import pygame
 import random
 import math
+from render import get_font, render_text
 
 class AnimatedBackground:
-    def __init__(self, screen):
+    def __init__(self, screen, rng=None):
         self.screen = screen
+        self.rng = rng or random.Random()  # Kept apart from the games' streams
         self.width = screen.get_width()
         self.height = screen.get_height()
         
@@ -18,16 +20,16 @@ class AnimatedBackground:
         
         # Initialize dots with random positions and directions
         for _ in range(self.num_dots):
-            x = random.randint(0, self.width)
-            y = random.randint(0, self.height)
-            dx = random.choice([-self.dot_speed, self.dot_speed])
-            dy = random.choice([-self.dot_speed, self.dot_speed])
+            x = self.rng.randint(0, self.width)
+            y = self.rng.randint(0, self.height)
+            dx = self.rng.choice([-self.dot_speed, self.dot_speed])
+            dy = self.rng.choice([-self.dot_speed, self.dot_speed])
             self.dots.append({
                 'x': x,
                 'y': y,
                 'dx': dx,
                 'dy': dy,
-                'alpha': random.randint(50, 255)  # Random transparency
+                'alpha': self.rng.randint(50, 255)  # Random transparency
             })
     
     def update(self):
@@ -74,8 +76,8 @@ class Button:
         self.text_color = (0, 0, 0)        # Black
         
         # Font
-        self.font = pygame.font.SysFont('Arial', 36)  # Increased font size
-        self.text_surf = self.font.render(text, True, self.text_color)
+        self.font = get_font('Arial', 36)  # Increased font size
+        self.text_surf = render_text(self.font, text, self.text_color)
         self.text_rect = self.text_surf.get_rect(center=(self.x + self.width//2, self.y + self.height//2))
         
     def draw(self):
@@ -103,12 +105,12 @@ class Button:
         return False
 
 class Menu:
-    def __init__(self, screen, start_game_callback):
+    def __init__(self, screen, start_game_callback, level_count=10):
         self.screen = screen
         self.start_game_callback = start_game_callback
         self.buttons = []
-        self.logo_font = pygame.font.SysFont('Arial', 96, bold=True)
-        self.info_font = pygame.font.SysFont('Arial', 32)
+        self.logo_font = get_font('Arial', 96, bold=True)
+        self.info_font = get_font('Arial', 32)
         
         # Create animated background
         self.background = AnimatedBackground(screen)
@@ -132,9 +134,9 @@ class Menu:
         # Calculate starting y-position for the grid of level buttons
         start_y = self.desc_y + 100
         
-        # Create a grid of level buttons (2 rows x 5 columns)
-        for row in range(2):
-            for col in range(5):
+        # Create a grid of level buttons, 5 columns wide
+        for row in range((level_count + 4) // 5):
+            for col in range(min(5, level_count - row * 5)):
                 level = row * 5 + col + 1
                 x = (screen_width - (button_width * 5 + button_spacing * 4)) // 2 + col * (button_width + button_spacing)
                 y = start_y + row * (button_height + button_spacing)
@@ -169,13 +171,13 @@ class Menu:
         self.background.draw()
         
         # Draw title
-        title_surf = self.logo_font.render("PAC-MAN ADVENTURE", True, (255, 255, 0))
+        title_surf = render_text(self.logo_font, "PAC-MAN ADVENTURE", (255, 255, 0))
         title_rect = title_surf.get_rect(center=(self.screen.get_width()//2, self.title_y))
         self.screen.blit(title_surf, title_rect)
         
         # Draw description
         description = "Navigate through mazes, eat dots, and avoid ghosts!"
-        desc_surf = self.info_font.render(description, True, (255, 255, 255))
+        desc_surf = render_text(self.info_font, description, (255, 255, 255))
         desc_rect = desc_surf.get_rect(center=(self.screen.get_width()//2, self.desc_y))
         self.screen.blit(desc_surf, desc_rect)
         
@@ -185,6 +187,6 @@ class Menu:
         
         # Draw instructions
         instructions = "Use arrow keys to control Pac-Man. Press ESC to return to menu."
-        inst_surf = self.info_font.render(instructions, True, (200, 200, 200))
+        inst_surf = render_text(self.info_font, instructions, (200, 200, 200))
         inst_rect = inst_surf.get_rect(center=(self.screen.get_width()//2, self.instructions_y))
         self.screen.blit(inst_surf, inst_rect)
\ No newline at end of file
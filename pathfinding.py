@@ -0,0 +1,180 @@
+# pathfinding.py - Maze distance tables for ghost navigation
+import os
+import argparse
+import hashlib
+import time
+import numpy as np
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from entities import align_to_tile
+from tilegrid import DIRECTIONS, TileGrid
+
+# Distance stored for tiles that can't reach each other
+UNREACHABLE = np.iinfo(np.uint16).max
+
+# Tables computed in this process, keyed by layout hash
+_tables = {}
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+def layout_key(layout):
+    return hashlib.sha1("\n".join(layout).encode()).hexdigest()
+
+class DistanceTable:
+    def __init__(self, layout, distances=None):
+        self.layout = layout
+        grid = TileGrid(layout)
+        self.rows = grid.rows
+        self.cols = grid.cols
+
+        # Walkable tiles are numbered in row order; index maps a flat
+        # (row * cols + col) position to that number, or -1 for walls
+        self.tiles = np.flatnonzero(grid.walkable)
+        self.index = np.full(self.rows * self.cols, -1, dtype=np.int64)
+        self.index[self.tiles] = np.arange(len(self.tiles))
+
+        # neighbors[i, d] is the tile one step from tile i in DIRECTIONS[d]
+        links = np.array(grid.neighbors, dtype=np.int64).reshape(-1, 4)[self.tiles]
+        self.neighbors = np.where(links >= 0, self.index[links], -1)
+        self.neighbor_lists = self.neighbors.tolist()
+        self.index_list = self.index.tolist()
+
+        # Distances read from a cache are only trusted if the shape fits
+        count = len(self.tiles)
+        if distances is None or distances.shape != (count, count):
+            distances = self.compute()
+        self.distances = distances
+
+    def compute(self):
+        # Breadth-first search from every tile at once: row i of the
+        # frontier holds the tiles first reached from tile i on this step
+        count = len(self.tiles)
+        distances = np.full((count, count), UNREACHABLE, dtype=np.uint16)
+        np.fill_diagonal(distances, 0)
+        reached = np.eye(count, dtype=bool)
+        frontier = reached.copy()
+
+        # Missing neighbors point at an extra column that is always False
+        neighbors = np.where(self.neighbors < 0, count, self.neighbors)
+        padded = np.zeros((count, count + 1), dtype=bool)
+
+        step = 0
+        while frontier.any():
+            step += 1
+            padded[:, :count] = frontier
+            frontier = padded[:, neighbors].any(2) & ~reached
+            distances[frontier] = step
+            reached |= frontier
+        return distances
+
+    @property
+    def nbytes(self):
+        return self.distances.nbytes
+
+    def tile(self, col, row):
+        # Tile number at a grid position, or -1 for walls and off-map
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return self.index_list[row * self.cols + col]
+        return -1
+
+    def distance(self, a, b):
+        return int(self.distances[a, b])
+
+    def next_step(self, a, b):
+        # Direction of the first move on a shortest path from tile a to
+        # tile b; None when already there or b can't be reached
+        remaining = int(self.distances[a, b])
+        if remaining == 0 or remaining == UNREACHABLE:
+            return None
+        for d, neighbor in enumerate(self.neighbor_lists[a]):
+            if neighbor >= 0 and self.distances[neighbor, b] == remaining - 1:
+                return DIRECTIONS[d]
+        return None
+
+    def step_away(self, a, b, current=None):
+        # Move from tile a that most increases the distance from tile b,
+        # keeping the current direction on a tie
+        best = None
+        best_distance = -1
+        for d, neighbor in enumerate(self.neighbor_lists[a]):
+            if neighbor < 0:
+                continue
+            distance = int(self.distances[neighbor, b])
+            if distance == UNREACHABLE:
+                continue
+            if distance > best_distance or (distance == best_distance and DIRECTIONS[d] == current):
+                best = DIRECTIONS[d]
+                best_distance = distance
+        return best
+
+def load_distance_table(layout, cache_dir=CACHE_DIR):
+    # Built the first time a layout is used, then read back from disk
+    key = layout_key(layout)
+    table = _tables.get(key)
+    if table is not None:
+        return table
+
+    path = os.path.join(cache_dir, f"distances-{key}.npy")
+    distances = None
+    if os.path.exists(path):
+        distances = np.load(path)
+
+    table = DistanceTable(layout, distances)
+    if table.distances is not distances:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            temp_path = path + ".tmp"
+            with open(temp_path, 'wb') as f:
+                np.save(f, table.distances)
+            os.replace(temp_path, path)
+        except OSError:
+            pass  # A read-only checkout still works, it just rebuilds
+
+    _tables[key] = table
+    return table
+
+class TileNavigator:
+    def __init__(self, table, offset_x, offset_y, tile_size):
+        # Steers entities through a level using its distance table
+        self.table = table
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.tile_size = tile_size
+
+    def tile_at(self, x, y):
+        # Tile number under a screen point, or -1
+        return self.table.tile((x - self.offset_x) // self.tile_size, (y - self.offset_y) // self.tile_size)
+
+    def toward(self, rect, target):
+        # Direction along a shortest path to the target point, or None when
+        # the table can't help (same tile, off the maze or cut off)
+        here = self.tile_at(*rect.center)
+        goal = self.tile_at(*target)
+        if here < 0 or goal < 0:
+            return None
+        step = self.table.next_step(here, goal)
+        return align_to_tile(rect, step, self.offset_x, self.offset_y, self.tile_size) if step else None
+
+    def away(self, rect, threat, current=None):
+        # Direction that gets furthest from the threat point through the maze
+        here = self.tile_at(*rect.center)
+        danger = self.tile_at(*threat)
+        if here < 0 or danger < 0:
+            return None
+        step = self.table.step_away(here, danger, current)
+        return align_to_tile(rect, step, self.offset_x, self.offset_y, self.tile_size) if step else None
+
+if __name__ == "__main__":
+    from level import LEVEL_LAYOUTS
+
+    parser = argparse.ArgumentParser(description="Build the distance tables for every level")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args()
+
+    for level_num, layout in enumerate(LEVEL_LAYOUTS, 1):
+        start = time.perf_counter()
+        table = load_distance_table(layout, args.cache_dir)
+        elapsed = time.perf_counter() - start
+        print(f"level {level_num:2d}: {len(table.tiles)} walkable tiles, {table.nbytes / 1024:,.0f} KiB, "
+              f"{elapsed * 1000:.1f} ms")
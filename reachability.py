@@ -0,0 +1,114 @@
+# reachability.py - Flood-fill analysis of what Pac-Man can reach in a layout
+import os
+import argparse
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from tilegrid import TileGrid
+
+class Reachability:
+    def __init__(self, layout):
+        # Tiles are (x, y); see TileGrid for what counts as walkable
+        self.grid = TileGrid(layout)
+        self.rows = self.grid.rows
+        self.cols = self.grid.cols
+        self.walkable = {
+            (index % self.cols, index // self.cols)
+            for index, open_ in enumerate(self.grid.walkable)
+            if open_
+        }
+
+        # Pac-Man starts on the last 'P', as in the game
+        self.start = None
+        pellets = []
+        for y, row in enumerate(layout):
+            for x, cell in enumerate(row):
+                if cell == 'P':
+                    self.start = (x, y)
+                elif cell in '.O':
+                    pellets.append((x, y))
+
+        # Split the walkable tiles into connected regions; the one holding
+        # the start is what Pac-Man can reach
+        self.reachable = set()
+        self.regions = []
+        seen = set()
+        for y in range(self.rows):
+            for x in range(self.cols):
+                tile = (x, y)
+                if tile in self.walkable and tile not in seen:
+                    region = self.flood(tile)
+                    seen |= region
+                    if self.start in region:
+                        self.reachable = region
+                    else:
+                        self.regions.append(region)
+
+        self.unreachable_pellets = [tile for tile in pellets if tile not in self.reachable]
+
+        # Dead ends: reachable tiles with a single way out
+        self.dead_ends = [
+            tile for tile in sorted(self.reachable, key=lambda tile: (tile[1], tile[0]))
+            if len(self.neighbors(tile)) == 1
+        ]
+
+        # Tunnel exits: walkable tiles on the edge of the layout, which lead
+        # off the maze instead of into a wall
+        self.tunnel_exits = [
+            tile for tile in sorted(self.walkable, key=lambda tile: (tile[1], tile[0]))
+            if tile[0] in (0, self.cols - 1) or tile[1] in (0, self.rows - 1)
+        ]
+
+    def neighbors(self, tile):
+        x, y = tile
+        return [
+            (neighbor % self.cols, neighbor // self.cols)
+            for neighbor in self.grid.neighbors[y * self.cols + x]
+            if neighbor >= 0
+        ]
+
+    def flood(self, start):
+        x, y = start
+        return {(tile % self.cols, tile // self.cols) for tile in self.grid.flood(y * self.cols + x)}
+
+def describe(tiles, limit=8):
+    # Tiles as 1-based "row:column" for people reading the report
+    text = ", ".join(f"{y + 1}:{x + 1}" for x, y in tiles[:limit])
+    return text + (f" and {len(tiles) - limit} more" if len(tiles) > limit else "")
+
+def analyze_levels(layouts):
+    # One report per layout, for checking a whole level set in one go
+    return [Reachability(layout) for layout in layouts]
+
+if __name__ == "__main__":
+    from level import LEVEL_LAYOUTS, LevelDirectory, load_level_file
+
+    parser = argparse.ArgumentParser(description="Report what Pac-Man can't reach in every level")
+    parser.add_argument("--levels", metavar="DIR", help="also check the level files in DIR")
+    args = parser.parse_args()
+
+    layouts = list(LEVEL_LAYOUTS)
+    if args.levels:
+        layouts += [load_level_file(path).rows for path in LevelDirectory(args.levels).files]
+
+    start = time.perf_counter()
+    reports = analyze_levels(layouts)
+    elapsed = time.perf_counter() - start
+
+    for level_num, report in enumerate(reports, 1):
+        print(f"level {level_num:2d}: {len(report.reachable)} of {len(report.walkable)} walkable tiles reachable, "
+              f"{len(report.unreachable_pellets)} unreachable pellets, {len(report.regions)} cut-off regions, "
+              f"{len(report.dead_ends)} dead ends, {len(report.tunnel_exits)} tunnel exits")
+        if report.start is None:
+            print("    no 'P', nothing is reachable")
+        if report.unreachable_pellets:
+            print(f"    unreachable pellets (row:column): {describe(report.unreachable_pellets)}")
+        for region in report.regions:
+            tiles = sorted(region, key=lambda tile: (tile[1], tile[0]))
+            print(f"    cut-off region of {len(tiles)} tiles from {describe(tiles, 1)}")
+        if report.dead_ends:
+            print(f"    dead ends: {describe(report.dead_ends)}")
+        if report.tunnel_exits:
+            print(f"    tunnel exits: {describe(report.tunnel_exits)}")
+    print(f"{len(reports)} levels analyzed in {elapsed * 1000:.1f} ms")
@@ -0,0 +1,232 @@
+# render.py - Cached surfaces shared by the game screens
+import pygame
+import math
+from collections import OrderedDict
+
+# Fonts resolved once per process, keyed by (name, size, bold)
+_fonts = {}
+
+# Rendered text surfaces keyed by (font, text, color), least recently used first
+TEXT_CACHE_SIZE = 256
+_text_cache = OrderedDict()
+
+# Pre-rendered maze layers keyed by level, wall color and placement
+_maze_layers = {}
+
+def get_maze_layer(walls_key, wall_color, wall_rects):
+    # Walls never change within a level, so they are drawn once off-screen
+    # and every frame costs a single blit. walls_key is a digest of the
+    # wall rects themselves (level files can be edited between games, so
+    # the level number is not enough); it keeps the lookup cheap
+    key = (walls_key, wall_color)
+    cached = _maze_layers.get(key)
+    if cached is None:
+        bounds = pygame.Rect(wall_rects[0]).unionall(wall_rects[1:])
+        layer = pygame.Surface(bounds.size)
+        if pygame.display.get_surface() is not None:
+            layer = layer.convert()
+        layer.fill((0, 0, 0))
+        for wall_rect in wall_rects:
+            pygame.draw.rect(layer, wall_color, pygame.Rect(wall_rect).move(-bounds.x, -bounds.y))
+        cached = (layer, bounds.topleft)
+        _maze_layers[key] = cached
+
+    return cached
+
+# Pac-Man frames keyed by (size, direction, mouth angle)
+_pacman_frames = {}
+
+# Mouth direction in degrees for each movement direction
+_MOUTH_ANGLES = {(1, 0): 0, (0, 1): 90, (-1, 0): 180, (0, -1): 270}
+
+def get_pacman_frame(size, direction, mouth_angle):
+    # There are only a few mouth angles per direction, so each frame is
+    # drawn once and blitted from then on
+    key = (size, direction, mouth_angle)
+    frame = _pacman_frames.get(key)
+    if frame is None:
+        # One spare pixel: circles can spill past their radius
+        frame = pygame.Surface((size + 1, size + 1), pygame.SRCALPHA)
+        center = (size//2, size//2)
+        
+        # Pac-Man is a yellow circle with a mouth
+        pygame.draw.circle(frame, (255, 255, 0), center, size//2)
+        
+        # Draw the mouth as a pie slice, only while moving
+        if direction != (0, 0):
+            angle = _MOUTH_ANGLES.get(direction, 0)
+            pygame.draw.polygon(frame, (0, 0, 0), [
+                center,
+                (center[0] + math.cos(math.radians(angle - mouth_angle)) * size//2,
+                 center[1] + math.sin(math.radians(angle - mouth_angle)) * size//2),
+                (center[0] + math.cos(math.radians(angle + mouth_angle)) * size//2,
+                 center[1] + math.sin(math.radians(angle + mouth_angle)) * size//2)
+            ])
+        _pacman_frames[key] = frame
+    return frame
+
+# Ghost sprites keyed by (size, color, scared, direction)
+_ghost_sprites = {}
+
+def get_ghost_sprite(size, color, scared, direction):
+    # A ghost's look only depends on these four values, so each one is
+    # drawn once and every ghost on screen is a single blit
+    key = (size, color, scared, direction)
+    sprite = _ghost_sprites.get(key)
+    if sprite is None:
+        margin = size//2
+        sprite = pygame.Surface((size + margin*2 + 1, size + margin*2 + 1), pygame.SRCALPHA)
+        rect = pygame.Rect(margin, margin, size, size)
+        
+        # Draw the main body (semi-circle)
+        pygame.draw.circle(sprite, color, (rect.centerx, rect.centery - size//4), size//2)
+        
+        # Draw the lower part (wavy bottom)
+        wave_rect = pygame.Rect(
+            rect.x,
+            rect.centery - size//4,
+            size,
+            size//2
+        )
+        pygame.draw.rect(sprite, color, wave_rect)
+        
+        # Draw the bottom waves
+        wave_height = size//6
+        wave_width = size//3
+        
+        for i in range(3):
+            x_start = rect.x + i * wave_width
+            pygame.draw.circle(
+                sprite,
+                (0, 0, 0),  # Background color (for the gaps)
+                (x_start + wave_width//2, rect.bottom),
+                wave_height
+            )
+        
+        # Draw eyes
+        eye_size = size//5
+        eye_y = rect.centery - size//4
+        
+        # Eye whites
+        pygame.draw.circle(sprite, (255, 255, 255), (rect.centerx - eye_size, eye_y), eye_size)
+        pygame.draw.circle(sprite, (255, 255, 255), (rect.centerx + eye_size, eye_y), eye_size)
+        
+        # Eye pupils - position based on direction
+        pupil_offset_x = direction[0] * eye_size//2
+        pupil_offset_y = direction[1] * eye_size//2
+        
+        if scared:
+            pygame.draw.circle(sprite, (0, 0, 0), (rect.centerx - eye_size, eye_y), eye_size//2)
+            pygame.draw.circle(sprite, (0, 0, 0), (rect.centerx + eye_size, eye_y), eye_size//2)
+        else:
+            # Normal pupil eyes
+            pygame.draw.circle(
+                sprite, 
+                (0, 0, 255), 
+                (rect.centerx - eye_size + pupil_offset_x, eye_y + pupil_offset_y), 
+                eye_size//2
+            )
+            pygame.draw.circle(
+                sprite, 
+                (0, 0, 255), 
+                (rect.centerx + eye_size + pupil_offset_x, eye_y + pupil_offset_y), 
+                eye_size//2
+            )
+        
+        _ghost_sprites[key] = (sprite, margin)
+    return _ghost_sprites[key]
+
+def get_font(name, size, bold=False):
+    # SysFont has to search the system font list, so only do it once
+    key = (name, size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.SysFont(name, size, bold=bold)
+        _fonts[key] = font
+    return font
+
+def render_text(font, text, color):
+    key = (font, text, color)
+    surface = _text_cache.get(key)
+    if surface is None:
+        surface = font.render(text, True, color)
+        _text_cache[key] = surface
+        if len(_text_cache) > TEXT_CACHE_SIZE:
+            _text_cache.popitem(last=False)
+    else:
+        _text_cache.move_to_end(key)
+    return surface
+
+class DirtyRectRenderer:
+    def __init__(self, screen):
+        self.screen = screen
+        self.screen_rect = screen.get_rect()
+        self.screen_area = self.screen_rect.width * self.screen_rect.height
+
+        # Sprites are pushed where they are drawn and again on the next
+        # frame, where they have to be erased
+        self.sprite_rects = []
+        self.last_sprite_rects = []
+        self.changed_rects = []
+        self.full_update = True
+
+        # Fraction of the screen pushed to the display
+        self.last_fraction = 1.0
+        self.total_fraction = 0.0
+        self.frames = 0
+
+    def begin_frame(self):
+        # A full update starts from a blank screen; otherwise the previous
+        # frame is drawn over
+        if self.full_update:
+            self.screen.fill((0, 0, 0))
+
+    def add_sprite(self, rect):
+        # Circles can spill one pixel past the bounds pygame reports
+        self.sprite_rects.append(pygame.Rect(rect).inflate(2, 2))
+
+    def mark(self, rect):
+        self.changed_rects.append(pygame.Rect(rect).inflate(2, 2))
+
+    def mark_all(self):
+        self.full_update = True
+
+    def present(self):
+        if self.full_update:
+            pygame.display.flip()
+            fraction = 1.0
+        else:
+            rects = merge_rects(
+                [rect.clip(self.screen_rect) for rect in self.last_sprite_rects + self.sprite_rects + self.changed_rects]
+            )
+            pygame.display.update(rects)
+            fraction = sum(rect.width * rect.height for rect in rects) / self.screen_area
+
+        self.last_fraction = fraction
+        self.total_fraction += fraction
+        self.frames += 1
+
+        self.last_sprite_rects = self.sprite_rects
+        self.sprite_rects = []
+        self.changed_rects = []
+        self.full_update = False
+
+    @property
+    def average_fraction(self):
+        return self.total_fraction / self.frames if self.frames else 0.0
+
+def merge_rects(rects):
+    # Fold overlapping rects together so no pixel is pushed twice
+    merged = []
+    for rect in rects:
+        if rect.width <= 0 or rect.height <= 0:
+            continue
+        i = 0
+        while i < len(merged):
+            if rect.colliderect(merged[i]):
+                rect = rect.union(merged.pop(i))
+                i = 0
+            else:
+                i += 1
+        merged.append(rect)
+    return merged
@@ -0,0 +1,164 @@
+# replay.py - Compact input recordings and deterministic playback
+import os
+import sys
+import argparse
+import struct
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from game import Game
+from level import LevelDirectory
+
+# File header: magic, format version, level, seed, ticks played, final
+# score, then the Game options that change how it plays: horde size, option
+# flags and ghost navigation
+MAGIC = b'PMRP'
+VERSION = 2
+HEADER = struct.Struct('<4sBHQIIIBB')
+
+SEPARATION = 1
+VECTORIZED = 2
+NAVIGATION = (None, 'distances', 'flow', 'junctions')
+
+class Replay:
+    def __init__(self, level_num, seed, events, ticks, score, options=None):
+        self.level_num = level_num
+        self.seed = seed
+        self.events = events  # (tick, input code) pairs, in the order applied
+        self.ticks = ticks
+        self.score = score
+        self.options = options or {}  # Game keyword arguments, such as horde
+
+class InputRecorder:
+    def __init__(self, game):
+        self.game = game
+        self.events = []
+        game.input_listeners.append(self.record)
+
+    def record(self, tick, code):
+        self.events.append((tick, code))
+
+    def finish(self):
+        # Stop listening and return what was captured
+        if self.record in self.game.input_listeners:
+            self.game.input_listeners.remove(self.record)
+        game = self.game
+        options = {
+            'horde': game.horde,
+            'ghost_separation': game.ghost_separation,
+            'vectorized_ghosts': game.vectorized_ghosts,
+            'navigation': game.navigation
+        }
+        return Replay(game.level_num, game.seed, list(self.events), game.tick, game.score, options)
+
+def encode_events(events):
+    # Inputs change rarely, so runs of the same code on consecutive ticks
+    # are stored once as (gap since the previous run, code, run length)
+    runs = []
+    for tick, code in events:
+        if runs:
+            start, run_code, length = runs[-1]
+            if run_code == code and tick == start + length:
+                runs[-1] = (start, code, length + 1)
+                continue
+        runs.append((tick, code, 1))
+
+    data = bytearray()
+    previous = 0
+    for start, code, length in runs:
+        write_varint(data, start - previous)
+        data.append(code)
+        write_varint(data, length)
+        previous = start + length - 1
+    return bytes(data)
+
+def decode_events(data):
+    events = []
+    previous = 0
+    offset = 0
+    while offset < len(data):
+        gap, offset = read_varint(data, offset)
+        code = data[offset]
+        length, offset = read_varint(data, offset + 1)
+        start = previous + gap
+        events.extend((start + i, code) for i in range(length))
+        previous = start + length - 1
+    return events
+
+def write_varint(data, value):
+    # Little-endian base-128, 7 bits per byte
+    while value >= 0x80:
+        data.append((value & 0x7F) | 0x80)
+        value >>= 7
+    data.append(value)
+
+def read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+def save_replay(replay, path):
+    with open(path, 'wb') as f:
+        options = replay.options
+        flags = (SEPARATION if options.get('ghost_separation') else 0) | \
+                (VECTORIZED if options.get('vectorized_ghosts') else 0)
+        f.write(HEADER.pack(MAGIC, VERSION, replay.level_num, replay.seed, replay.ticks, replay.score,
+                            options.get('horde', 0), flags, NAVIGATION.index(options.get('navigation'))))
+        f.write(encode_events(replay.events))
+
+def load_replay(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version = data[:4], data[4]
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} replay file")
+    _, _, level_num, seed, ticks, score, horde, flags, navigation = HEADER.unpack_from(data)
+    options = {
+        'horde': horde,
+        'ghost_separation': bool(flags & SEPARATION),
+        'vectorized_ghosts': bool(flags & VECTORIZED),
+        'navigation': NAVIGATION[navigation]
+    }
+    return Replay(level_num, seed, decode_events(data[HEADER.size:]), ticks, score, options)
+
+def play_replay(replay, levels=None):
+    # Feed the recorded inputs into a headless game, tick by tick, with the
+    # options it was recorded with; levels must be the level directory or
+    # pack the game was recorded with
+    game = Game(None, replay.level_num, seed=replay.seed, levels=levels, **replay.options)
+    events = replay.events
+    index = 0
+    for tick in range(replay.ticks):
+        while index < len(events) and events[index][0] == tick:
+            game.apply_input(events[index][1])
+            index += 1
+        game.update()
+    return game
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play back recorded games headless")
+    parser.add_argument("replays", nargs="+", help="replay files written by main.py --record")
+    parser.add_argument("--levels", metavar="DIR", help="level files the games were recorded with")
+    args = parser.parse_args()
+    levels = LevelDirectory(args.levels) if args.levels else None
+
+    mismatches = 0
+    for path in args.replays:
+        replay = load_replay(path)
+        start = time.perf_counter()
+        game = play_replay(replay, levels)
+        elapsed = time.perf_counter() - start
+
+        status = "ok" if game.score == replay.score else f"MISMATCH (recorded {replay.score})"
+        mismatches += game.score != replay.score
+        print(f"{path}: level {replay.level_num}, {replay.ticks} ticks, {len(replay.events)} inputs, "
+              f"score {game.score} {status}, {replay.ticks / max(elapsed, 1e-9):,.0f} ticks per second")
+
+    sys.exit(1 if mismatches else 0)
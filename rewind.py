@@ -0,0 +1,79 @@
+# rewind.py - Ring buffer of recent play for practice-mode rewind
+import sys
+from collections import deque
+
+class RewindBuffer:
+    def __init__(self, game, seconds=10, keyframe_interval=30, max_bytes=4 * 1024 * 1024, tick_rate=60):
+        # A full snapshot is kept every keyframe_interval ticks and only the
+        # inputs in between; seeking restores the nearest keyframe and
+        # replays the inputs forward
+        self.game = game
+        self.keyframe_interval = keyframe_interval
+
+        # Enough segments to cover the requested time, fewer if that would
+        # go over the memory budget
+        wanted = -(-seconds * tick_rate // keyframe_interval) + 1
+        affordable = max(2, max_bytes // snapshot_size(game.snapshot()))
+        self.segments = deque(maxlen=min(wanted, affordable))
+
+        self.replaying = False
+        game.input_listeners.append(self.record_input)
+
+    @property
+    def capacity_ticks(self):
+        # How far back a full buffer reaches
+        return (self.segments.maxlen - 1) * self.keyframe_interval
+
+    @property
+    def oldest_tick(self):
+        return self.segments[0][0] if self.segments else self.game.tick
+
+    def record_tick(self):
+        # Call right before each game.update() during normal play
+        if not self.segments or self.game.tick - self.segments[-1][0] >= self.keyframe_interval:
+            self.segments.append((self.game.tick, self.game.snapshot(), []))
+
+    def record_input(self, tick, code):
+        if self.segments and not self.replaying:
+            self.segments[-1][2].append((tick, code))
+
+    def rewind(self, ticks=1):
+        # Step the game back by up to ticks; returns False once the start of
+        # the buffer has been reached
+        target = max(self.oldest_tick, self.game.tick - ticks)
+        if target >= self.game.tick:
+            return False
+
+        # Drop segments that start after the target
+        while len(self.segments) > 1 and self.segments[-1][0] > target:
+            self.segments.pop()
+        start, snapshot, inputs = self.segments[-1]
+
+        # Restore the keyframe and replay the recorded inputs up to target
+        self.game.restore(snapshot)
+        self.replaying = True
+        index = 0
+        for tick in range(start, target):
+            while index < len(inputs) and inputs[index][0] == tick:
+                self.game.apply_input(inputs[index][1])
+                index += 1
+            self.game.update()
+        self.replaying = False
+
+        # Inputs after the target belong to the future we just undid
+        del inputs[index:]
+        return True
+
+    def clear(self):
+        self.segments.clear()
+
+    def detach(self):
+        if self.record_input in self.game.input_listeners:
+            self.game.input_listeners.remove(self.record_input)
+
+def snapshot_size(value):
+    # Rough memory footprint of a snapshot's nested tuples, bytes and numbers
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        size += sum(snapshot_size(item) for item in value)
+    return size
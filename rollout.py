@@ -0,0 +1,108 @@
+# rollout.py - Run many seeded headless games across a process pool
+import os
+import argparse
+import random
+import time
+from multiprocessing import Pool
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from game import Game, ACTIONS
+from level import LEVEL_LAYOUTS
+
+# Longest game before it is called off, in frames (5 minutes at 60 FPS)
+MAX_FRAMES = 18000
+
+def idle_policy(game, rng):
+    # Never touch the controls
+    return 0
+
+def random_policy(game, rng):
+    # Keep going, and now and then press a random arrow key
+    if rng.random() < 0.05 or not game.pacman.moving:
+        return rng.randrange(1, len(ACTIONS))
+    return 0
+
+POLICIES = {
+    'idle': idle_policy,
+    'random': random_policy
+}
+
+def run_game(task):
+    # task is (level_num, seed, policy, max_frames); policy is a name from
+    # POLICIES or any picklable callable taking (game, rng)
+    level_num, seed, policy, max_frames = task
+    if isinstance(policy, str):
+        policy = POLICIES[policy]
+
+    # The policy gets its own stream derived from the seed; seeding it with
+    # the game's seed would replay the game's random numbers
+    game = Game(None, level_num, seed=seed)
+    rng = random.Random(f"{seed}-policy")
+
+    frames = 0
+    while game.game_active and frames < max_frames:
+        game.step(policy(game, rng))
+        frames += 1
+
+    if game.outcome == 'game_over':
+        cause = f"caught by {game.caught_by} ghost"
+    elif game.outcome is None:
+        cause = 'timeout'
+    else:
+        cause = None
+
+    return {
+        'level': level_num,
+        'seed': seed,
+        'score': game.score,
+        'frames': frames,
+        'pellets_left': game.pellet_grid.remaining,
+        'lives': game.lives,
+        'outcome': game.outcome or 'timeout',
+        'cause_of_death': cause
+    }
+
+def make_tasks(levels, games_per_level, policy='random', max_frames=MAX_FRAMES, base_seed=0):
+    # One task per (level, seed), seeds numbered from base_seed
+    return [
+        (level_num, base_seed + i, policy, max_frames)
+        for level_num in levels
+        for i in range(games_per_level)
+    ]
+
+def run_rollouts(tasks, workers=None, chunksize=None):
+    # Yield results as workers finish them; tasks are handed out in chunks
+    # so every core stays busy without per-game scheduling overhead
+    workers = workers or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(tasks) // (workers * 4))
+
+    with Pool(workers) as pool:
+        for result in pool.imap_unordered(run_game, tasks, chunksize):
+            yield result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run seeded headless Pac-Man games in parallel")
+    parser.add_argument("--levels", type=int, nargs="+", default=list(range(1, len(LEVEL_LAYOUTS) + 1)))
+    parser.add_argument("--games", type=int, default=20, help="games per level")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=None)
+    parser.add_argument("--max-frames", type=int, default=MAX_FRAMES)
+    parser.add_argument("--seed", type=int, default=0, help="first seed")
+    args = parser.parse_args()
+
+    tasks = make_tasks(args.levels, args.games, args.policy, args.max_frames, args.seed)
+    start = time.perf_counter()
+    total_frames = 0
+
+    for result in run_rollouts(tasks, args.workers, args.chunksize):
+        total_frames += result['frames']
+        print(f"level {result['level']:2d} seed {result['seed']:5d}: score {result['score']:5d}, "
+              f"{result['frames']:6d} frames, {result['pellets_left']:4d} pellets left, "
+              f"{result['cause_of_death'] or result['outcome']}")
+
+    elapsed = time.perf_counter() - start
+    print(f"{len(tasks)} games, {total_frames:,} frames in {elapsed:.1f}s "
+          f"({total_frames / elapsed:,.0f} frames per second)")
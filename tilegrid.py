@@ -0,0 +1,54 @@
+# tilegrid.py - Walkable tile grid shared by the maze analyzers
+
+# Neighbor order used everywhere: right, left, down, up
+DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+class TileGrid:
+    def __init__(self, layout):
+        # Tiles are numbered row * cols + col. Every tile that isn't a wall
+        # is walkable, including the blank space past the end of a short
+        # row; the game puts its boundary walls around the first row's
+        # width, so longer rows are cut there
+        self.rows = len(layout)
+        self.cols = len(layout[0])
+        self.walkable = [
+            x >= len(row) or row[x] != 'W'
+            for row in layout
+            for x in range(self.cols)
+        ]
+
+        # neighbors[tile][d] is the walkable tile one step away in
+        # DIRECTIONS[d], or -1
+        walkable = self.walkable
+        self.neighbors = []
+        for index, open_ in enumerate(walkable):
+            y, x = divmod(index, self.cols)
+            links = []
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                inside = 0 <= nx < self.cols and 0 <= ny < self.rows
+                links.append(ny * self.cols + nx if open_ and inside and walkable[ny * self.cols + nx] else -1)
+            self.neighbors.append(links)
+
+    def tile(self, col, row):
+        # Walkable tile at a grid position, or -1 for walls and off-map
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            index = row * self.cols + col
+            if self.walkable[index]:
+                return index
+        return -1
+
+    def tile_at(self, x, y, offset_x, offset_y, tile_size):
+        # Walkable tile under a screen point, or -1
+        return self.tile((x - offset_x) // tile_size, (y - offset_y) // tile_size)
+
+    def flood(self, start):
+        # Every tile connected to start
+        region = {start}
+        stack = [start]
+        while stack:
+            for neighbor in self.neighbors[stack.pop()]:
+                if neighbor >= 0 and neighbor not in region:
+                    region.add(neighbor)
+                    stack.append(neighbor)
+        return region